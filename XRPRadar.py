@@ -1,6 +1,40 @@
 from machine import UART, Pin
+from array import array
+import collections
+import micropython
+import struct
 import time
 
+REPORT_FIELDS = 12  # x, y, speed, res for each of the 3 target slots
+
+
+def decode_report_into(frame, out, pos=0):
+    """
+    Unpacks one 30-byte report frame into out[pos:pos + 12], reading each
+    little-endian word straight from the frame bytes so nothing is
+    allocated. out can be an array('h') or a writable memoryview of one.
+    Values are the raw sensor units: x/y/res in mm, speed in cm/s.
+    """
+    for i in range(REPORT_FIELDS):
+        o = 4 + 2 * i
+        raw = frame[o] | frame[o + 1] << 8
+        if i & 3 == 3:
+            out[pos + i] = raw & 0x7FFF  # res is unsigned and always < 32768 mm
+        else:
+            # Sign-magnitude: bit 15 set means positive
+            neg = (raw >> 15) ^ 1
+            out[pos + i] = ((raw & 0x7FFF) ^ -neg) + neg
+
+
+def corridor_zone(threshold_cm, width_cm, floor_cm=0):
+    """
+    Region (x1, y1, x2, y2) in cm covering the strip straight ahead of the
+    robot: width_cm wide, from floor_cm out to threshold_cm.
+    """
+    half = width_cm / 2
+    return (-half, floor_cm, half, threshold_cm)
+
+
 class XRPRadar:
     # Protocol Constants
     COMMAND_HEADER = b'\xfd\xfc\xfb\xfa'
@@ -8,59 +42,94 @@ class XRPRadar:
     REPORT_HEADER = b'\xaa\xff\x03\x00'
     REPORT_TAIL = b'\x55\xcc'
     
+    REPORT_FRAME_LEN = 30
+    MAX_COMMAND_DATA = 64  # longest intra-frame length accepted in an ACK
+
     BAUD_RATES = [9600, 19200, 38400, 57600, 115200, 230400, 256000, 460800]
 
-    def __init__(self, uart_id, tx_pin, rx_pin, baudrate=256000):
-        """Initializes the UART and persistent buffer."""
-        self.ser = UART(uart_id, baudrate=baudrate, tx=Pin(tx_pin), rx=Pin(rx_pin))
-        self.buffer = bytearray(512) 
-        self.buffer_idx = 0
-        self.buffer_len = 0
+    # Region filter types (command 0x00C2)
+    ZONE_OFF = 0      # report everything
+    ZONE_DETECT = 1   # report only targets inside the zones
+    ZONE_EXCLUDE = 2  # report only targets outside the zones
+    MAX_ZONES = 3
+
+    def __init__(self, uart_id, tx_pin, rx_pin, baudrate=256000, buffer_size=1024, uart=None,
+                 report_queue=4, ack_queue=4):
+        """
+        Initializes the UART, a fixed-capacity ring buffer and the bounded
+        report/ACK queues. buffer_size must be a power of two. Pass uart to
+        use an already opened port (or any object with any/readinto/write).
+        """
+        if buffer_size & (buffer_size - 1):
+            raise ValueError("buffer_size must be a power of two")
+        if uart is None:
+            uart = UART(uart_id, baudrate=baudrate, tx=Pin(tx_pin), rx=Pin(rx_pin))
+        self.ser = uart
+        self.baudrate = baudrate
+        self._buf = bytearray(buffer_size)
+        self._mv = memoryview(self._buf)
+        self._size = buffer_size
+        self._mask = buffer_size - 1
+        self._head = 0   # index of the oldest unread byte
+        self._count = 0  # number of unread bytes
+
+        # Demultiplexed frames. Reports live in preallocated slots, oldest
+        # dropped when full; ACKs are rare so they are kept as bytes.
+        self._reports = [bytearray(self.REPORT_FRAME_LEN) for _ in range(report_queue)]
+        self._rq_head = 0
+        self._rq_count = 0
+        self._acks = collections.deque((), ack_queue)
+        self._acks_max = ack_queue
+        self._scratch = array('h', [0] * REPORT_FIELDS)
+        self._slot_seq = [0] * report_queue     # sequence number per slot
+        self._slot_ticks = [0] * report_queue   # arrival ticks_us per slot
+        self.last_report_seq = 0     # sequence number of the last report read
+        self.last_report_ticks = 0   # arrival ticks_us of the last report read
+
+        # Pipeline counters (see get_stats)
+        self.frames_ok = 0         # valid report frames parsed; doubles as the sequence number
+        self.frames_resynced = 0   # times the parser lost sync and had to hunt for a header
+        self.frames_skipped = 0    # stale frames dropped by latest-mode reads
+        self.frames_dropped = 0    # unread reports overwritten because the queue was full
+        self.bytes_discarded = 0   # garbage bytes and bytes lost to ring overflow
+        self.buffer_overflows = 0  # times the ring filled up before it was drained
+        self.frame_rate = 0.0      # report frames per second over the last window
+        self._in_sync = True
+        self._now = 0
+        self._rate_start = time.ticks_us()
+        self._rate_frames = 0
+
+        # Background (IRQ) ingestion state
+        self._irq_mode = False
+        self._busy = False            # a reader is touching the queues
+        self._ingest_scheduled = False
+        self._ingest_deferred = False
+        self._ingest_ref = self._ingest  # bound once so the IRQ never allocates
+        self._latest = array('h', [0] * REPORT_FIELDS)
+        self._latest_seq = 0
+        self.latest_ticks = 0  # arrival ticks_us of the latest-frame snapshot
+
+        # Outstanding command transactions, matched against incoming ACKs
+        self._pending = []
+        self.acks_unmatched = 0
+
+        self._capture = None  # RadarCapture while recording the raw stream
+
+        # Per-call work budget for the parser (None = unbounded), see set_work_budget
+        self.work_budget_bytes = None
+        self.work_budget_us = None
+        self.work_pending = False  # last parse stopped on its budget with input left
 
     def poll_for_response(self):
         """
-        Memory-safe version using a static bytearray buffer.
-        Finds COMMAND_TAIL without creating new objects.
+        Reads available UART data through the stream parser.
+        Returns the oldest queued command ACK frame, else None.
         """
-        if self.ser.any():
-            num_bytes = self.ser.any()
-            # Ensure we don't overflow our static buffer
-            if self.buffer_len + num_bytes < len(self.buffer):
-                # Read directly into the existing bytearray offset
-                self.ser.readinto(memoryview(self.buffer)[self.buffer_len : self.buffer_len + num_bytes])
-                self.buffer_len += num_bytes
-            else:
-                # If buffer is full, clear it to prevent a hang/leak
-                self.buffer_len = 0
-
-        # Search the populated area of the bytearray directly.
-        # We use a slice of the bytearray. In MicroPython, searching a 
-        # bytearray slice is efficient and does not require .tobytes()
-        try:
-            # We search only up to the current buffer_len
-            current_data = self.buffer[:self.buffer_len]
-            tail_idx = current_data.find(self.COMMAND_TAIL)
-        except Exception:
-            tail_idx = -1
-    
-        if tail_idx != -1:
-            end_of_tail = tail_idx + len(self.COMMAND_TAIL)
-            
-            # Create the response string only once to return it
-            full_response = bytes(self.buffer[:end_of_tail])
-            
-            # Shift trailing data to the front of the buffer (in-place)
-            remaining_len = self.buffer_len - end_of_tail
-            if remaining_len > 0:
-                self.buffer[:remaining_len] = self.buffer[end_of_tail : self.buffer_len]
-                self.buffer_len = remaining_len
-            else:
-                self.buffer_len = 0
-                
-            return full_response
-            
-        return None
-        
+        self._acquire()
+        response = self._acks.popleft() if self._acks else None
+        self._release()
+        return response
+
     def _send_command(self, intra_frame_length, command_word, command_value):
         """Constructs and sends a command frame."""
         command = self.COMMAND_HEADER + intra_frame_length + command_word + command_value + self.COMMAND_TAIL
@@ -74,6 +143,188 @@ class XRPRadar:
             return success_int == 0
         return False
 
+    # --- Command Transactions ---
+    def transact(self, command_word, command_value=b'', timeout_ms=200, retries=2):
+        """
+        Sends a command without waiting and returns a RadarCommand handle.
+        The handle completes when the ACK with command word | 0x0100
+        arrives; it is resent on timeout up to `retries` times.
+        While transactions are in flight they own the ACK queue, so do not
+        mix them with poll_for_response.
+        """
+        cmd = RadarCommand(self, command_word, command_value, timeout_ms, retries)
+        self._pending.append(cmd)
+        cmd._send()
+        return cmd
+
+    def update_transactions(self):
+        """Matches queued ACKs to pending commands and handles timeouts."""
+        if not self._pending:
+            return
+        while True:
+            ack = self.poll_for_response()
+            if ack is None:
+                break
+            word = ack[6] | (ack[7] << 8) if len(ack) >= 8 else -1
+            for cmd in self._pending:
+                if cmd.command_word | 0x0100 == word:
+                    cmd._complete(ack)
+                    break
+            else:
+                self.acks_unmatched += 1
+        now = time.ticks_ms()
+        for cmd in self._pending:
+            cmd._check_timeout(now)
+        self._pending = [cmd for cmd in self._pending if cmd.state == RadarCommand.PENDING]
+
+    def set_multi_target(self, enable=True, timeout_ms=200, retries=2):
+        """
+        Switches between multi- and single-target tracking without blocking.
+        Returns a RadarSequence handle; poll() it from the main loop.
+        """
+        return RadarSequence(self, [
+            (0x00FF, b'\x01\x00'),                 # enable configuration
+            (0x0090 if enable else 0x0080, b''),   # multi / single target
+            (0x00FE, b''),                         # end configuration
+        ], timeout_ms, retries)
+
+    # --- Region Filtering ---
+    def set_zone_filter(self, zone_type, zones=(), timeout_ms=200, retries=2):
+        """
+        Programs the sensor-side region filter so targets outside (or
+        inside, for ZONE_EXCLUDE) the zones are never reported. zones is up
+        to three (x1, y1, x2, y2) rectangles in cm. Returns a RadarSequence.
+        """
+        if len(zones) > self.MAX_ZONES:
+            raise ValueError("At most 3 zones")
+        coords = []
+        for zone in zones:
+            coords.extend(int(round(v * 10)) for v in zone)  # cm -> mm
+        coords.extend([0] * (4 * self.MAX_ZONES - len(coords)))
+        value = struct.pack('<H12h', zone_type, *coords)
+        return RadarSequence(self, [
+            (0x00FF, b'\x01\x00'),   # enable configuration
+            (0x00C2, value),
+            (0x00FE, b''),           # end configuration
+        ], timeout_ms, retries)
+
+    def clear_zone_filter(self, timeout_ms=200, retries=2):
+        """Turns the region filter off. Returns a RadarSequence."""
+        return self.set_zone_filter(self.ZONE_OFF, (), timeout_ms, retries)
+
+    def query_zone_filter(self, timeout_ms=200, retries=2):
+        """
+        Asks the sensor for its region filter. Returns a RadarSequence;
+        once it succeeds, pass it to zone_filter_from() to read the result.
+        """
+        return RadarSequence(self, [
+            (0x00FF, b'\x01\x00'),
+            (0x00C1, b''),
+            (0x00FE, b''),
+        ], timeout_ms, retries)
+
+    def zone_filter_from(self, seq):
+        """Returns (zone_type, [(x1, y1, x2, y2) cm, ...]) from a finished query."""
+        ack = seq.responses[1]
+        fields = struct.unpack_from('<H12h', ack, 10)  # after header, length, word, status
+        zones = []
+        for i in range(self.MAX_ZONES):
+            zone = tuple(v / 10.0 for v in fields[1 + 4 * i : 5 + 4 * i])
+            if zone != (0.0, 0.0, 0.0, 0.0):
+                zones.append(zone)
+        return fields[0], zones
+
+    # --- Link Speed ---
+    def _reset_parser(self):
+        """Forgets buffered bytes and queued frames (after a baud change)."""
+        self._head = 0
+        self._count = 0
+        self._rq_head = 0
+        self._rq_count = 0
+        self._acks = collections.deque((), self._acks_max)
+        self._in_sync = True
+
+    def _reopen(self, baud_rate):
+        """Re-initialises the local UART at baud_rate and clears the parser."""
+        self.ser.init(baudrate=baud_rate)
+        self.baudrate = baud_rate
+        self._reset_parser()
+
+    def measure_link(self, window_ms=200):
+        """
+        Drains the UART for window_ms in polled mode and returns
+        (good_frames, resyncs + bytes_discarded). Used to judge a baud rate.
+        """
+        ok = self.frames_ok
+        bad = self.frames_resynced + self.bytes_discarded
+        start = time.ticks_ms()
+        while time.ticks_diff(time.ticks_ms(), start) < window_ms:
+            self._pump()
+            time.sleep_ms(5)
+        self._rq_count = 0  # measurement frames are not for consumers
+        return self.frames_ok - ok, self.frames_resynced + self.bytes_discarded - bad
+
+    def probe_baud(self, window_ms=350, min_frames=2):
+        """
+        Finds the baud rate the sensor is talking at, trying the current
+        one first, then fastest to slowest. window_ms should cover at least
+        three report periods (~100 ms each). A rate passes with min_frames
+        good frames, or with one frame and no garbage at all; the partial
+        frame the window may open on is allowed for. Returns it, or None.
+        """
+        candidates = [self.baudrate] + [b for b in reversed(self.BAUD_RATES) if b != self.baudrate]
+        for baud in candidates:
+            self._reopen(baud)
+            good, bad = self.measure_link(window_ms)
+            if (good >= min_frames and bad <= good * self.REPORT_FRAME_LEN) or (good and not bad):
+                return baud
+        return None
+
+    def _change_baud(self, baud_rate, boot_ms):
+        """Tells the sensor to switch baud, restarts it and follows it locally."""
+        seq = RadarSequence(self, [
+            (0x00FF, b'\x01\x00'),                                       # enable configuration
+            (0x00A1, (self.BAUD_RATES.index(baud_rate) + 1).to_bytes(2, 'little')),
+            (0x00A3, b''),                                               # restart module
+        ])
+        if not seq.wait():
+            return False
+        self._reopen(baud_rate)
+        time.sleep_ms(boot_ms)
+        self._reset_parser()
+        return True
+
+    def negotiate_baud(self, target=460800, verify_ms=500, max_error_ratio=0.05, boot_ms=1200):
+        """
+        Startup routine: probes the sensor's current baud, upgrades the link
+        to `target` (set baud + restart), then checks frame integrity at the
+        new speed and falls back to the previous rate if the link is noisy.
+        Blocking - call before start_background. Returns the baud in use,
+        or None if the sensor was not heard at any rate (the port is left at
+        the baud it was opened with).
+        """
+        if self._irq_mode:
+            raise RuntimeError("negotiate_baud needs polled mode")
+        if target not in self.BAUD_RATES:
+            raise ValueError("Invalid baud rate")
+        opened = self.baudrate
+        current = self.probe_baud()
+        if current is None:
+            self._reopen(opened)
+            return None
+        if current == target:
+            return current
+        if not self._change_baud(target, boot_ms):
+            self._reopen(current)
+            return current
+        good, bad = self.measure_link(verify_ms)
+        if good and bad <= good * self.REPORT_FRAME_LEN * max_error_ratio:
+            return target
+        # Too noisy at the new speed - put the sensor back where it was
+        if not self._change_baud(current, boot_ms):
+            return self.probe_baud()
+        return self.baudrate
+
     # --- Command Methods ---
 
     def enable_configuration_mode(self):
@@ -97,7 +348,7 @@ class XRPRadar:
     def set_baud_rate(self, baud_rate):
         if baud_rate not in self.BAUD_RATES:
             raise ValueError("Invalid baud rate")
-        index = self.BAUD_RATES.index(baud_rate)
+        index = self.BAUD_RATES.index(baud_rate) + 1  # sensor indexes from 1 (9600)
         self._send_command((4).to_bytes(2, 'little'), b'\xa1\x00', index.to_bytes(2, 'little'))
 
     def restore_factory_settings(self):
@@ -114,42 +365,444 @@ class XRPRadar:
         self._send_command((4).to_bytes(2, 'little'), b'\xa5\x00', b'\x01\x00')
 
     # --- Data Parsing ---
-    def parse_radar_report(self):
-        if self.ser.any():
-            self.buffer += self.ser.read()
-        while self.REPORT_HEADER in self.buffer:
-            start = self.buffer.find(self.REPORT_HEADER)
-            # Look for tail starting from start + 28
-            tail_start = self.buffer.find(self.REPORT_TAIL, start + 28)
-            if tail_start != -1 and tail_start - start == 28:
-                frame = self.buffer[start : tail_start + 2]  # 30 bytes: header to tail inclusive
-#                print("Frame hex:", ' '.join(f'{b:02X}' for b in frame))  # debug
-                self.buffer = self.buffer[tail_start + 2 :]  # remove processed frame
-                targets = []
-                for i in range(3):
-                    offset = 4 + (i * 8)
-                    t = frame[offset:offset+8]
-                    # Decode as unsigned 16-bit little-endian
-                    x_raw = int.from_bytes(t[0:2], 'little')
-                    y_raw = int.from_bytes(t[2:4], 'little')
-                    speed_raw = int.from_bytes(t[4:6], 'little')
-                    res_raw = int.from_bytes(t[6:8], 'little')  # unsigned
-
-                    # Sign-magnitude for x, y, speed
-                    def signed_mag(raw):
-                        sign = (raw & 0x8000) >> 15  # 1 positive, 0 negative
-                        mag = raw & 0x7FFF
-                        return mag if sign == 1 else -mag
-
-                    x = signed_mag(x_raw) / 10.0  # cm
-                    y = signed_mag(y_raw) / 10.0  # cm
-                    speed = signed_mag(speed_raw)  # cm/s
-                    res = res_raw / 10.0  # cm
-
-                    targets.extend([x, y, speed, res])
-#                print("Parsed targets:", targets)  # debug
-                return tuple(targets)
+    def _fill(self, limit=None):
+        """Moves waiting UART bytes (at most limit) straight into the ring buffer."""
+        n = self.ser.any()
+        if limit is not None and n > limit:
+            n = limit
+        while n > 0:
+            if self._count == self._size:
+                # Ring is full: drop the oldest bytes so the freshest data is kept
+                drop = min(n, self._size)
+                self._head = (self._head + drop) & self._mask
+                self._count -= drop
+                self.buffer_overflows += 1
+                self.bytes_discarded += drop
+            tail = (self._head + self._count) & self._mask
+            chunk = min(n, self._size - self._count, self._size - tail)
+            got = self.ser.readinto(self._mv[tail : tail + chunk])
+            if not got:
+                break
+            if self._capture:
+                self._capture.write(self._mv[tail : tail + got])
+            self._count += got
+            n -= got
+
+    def _discard(self, n):
+        """Drops n bytes from the front of the ring buffer."""
+        self._head = (self._head + n) & self._mask
+        self._count -= n
+
+    def _skip(self, n):
+        """Drops n bytes that are not part of a valid frame, counting the resync."""
+        self._discard(n)
+        self.bytes_discarded += n
+        if self._in_sync:
+            self._in_sync = False
+            self.frames_resynced += 1
+
+    def _pump(self):
+        """
+        Incremental stream parser. Reads the UART once, then walks the ring
+        buffer a single time, sorting complete frames into the report queue
+        or the ACK queue. Bytes that belong to neither are dropped; a frame
+        that is still arriving is left in place for the next call.
+        With a work budget set, it stops after scanning that many bytes or
+        microseconds; the rest waits in the ring and work_pending is set.
+        """
+        max_bytes = self.work_budget_bytes
+        max_us = self.work_budget_us
+        self._fill(max_bytes)
+        self._now = time.ticks_us()
+        buf = self._buf
+        mask = self._mask
+        avail = self._count
+        pending = False
+        while self._count >= 4:
+            if max_bytes is not None and avail - self._count >= max_bytes:
+                pending = True
+                break
+            if max_us is not None and time.ticks_diff(time.ticks_us(), self._now) >= max_us:
+                pending = True
+                break
+            h = self._head
+            b0 = buf[h]
+            if b0 == 0xAA:
+                if not (buf[(h + 1) & mask] == 0xFF and buf[(h + 2) & mask] == 0x03
+                        and buf[(h + 3) & mask] == 0x00):
+                    self._skip(1)
+                    continue
+                if self._count < self.REPORT_FRAME_LEN:
+                    break  # wait for the rest of the frame
+                if buf[(h + 28) & mask] == 0x55 and buf[(h + 29) & mask] == 0xCC:
+                    self._queue_report(h)
+                    self._discard(self.REPORT_FRAME_LEN)
+                else:
+                    # Header without a tail where it belongs - skip header, try next
+                    self._skip(4)
+            elif b0 == 0xFD:
+                if not (buf[(h + 1) & mask] == 0xFC and buf[(h + 2) & mask] == 0xFB
+                        and buf[(h + 3) & mask] == 0xFA):
+                    self._skip(1)
+                    continue
+                if self._count < 6:
+                    break
+                data_len = buf[(h + 4) & mask] | (buf[(h + 5) & mask] << 8)
+                if data_len > self.MAX_COMMAND_DATA:
+                    self._skip(4)
+                    continue
+                total = 10 + data_len  # header + length + data + tail
+                if self._count < total:
+                    break
+                t = h + total - 4
+                if (buf[t & mask] == 0x04 and buf[(t + 1) & mask] == 0x03
+                        and buf[(t + 2) & mask] == 0x02 and buf[(t + 3) & mask] == 0x01):
+                    self._acks.append(bytes(buf[(h + k) & mask] for k in range(total)))
+                    self._discard(total)
+                    self._in_sync = True
+                else:
+                    self._skip(4)
+            else:
+                self._skip(1)
+        self.work_pending = pending or (max_bytes is not None and self.ser.any() > 0)
+
+    def set_work_budget(self, max_bytes=None, max_us=None):
+        """
+        Bounds how much parsing a single call may do: scan at most
+        max_bytes bytes and/or spend at most max_us microseconds. Parser
+        state carries over, so leftover input is handled by the next call
+        (or the next scheduled ingest in background mode). None = no limit.
+        """
+        self.work_budget_bytes = max_bytes
+        self.work_budget_us = max_us
+
+    def _acquire(self):
+        """
+        Gets the queues ready for a reader. Polled mode parses the UART
+        here; in background mode the IRQ path owns all I/O and only a busy
+        flag is raised so a scheduled ingest cannot run mid-read.
+        """
+        if self._irq_mode:
+            self._busy = True
+        else:
+            self._pump()
+
+    def _release(self):
+        """Ends a read; catches up on any ingest deferred while busy."""
+        while self._ingest_deferred:
+            self._ingest_deferred = False
+            self._pump()
+            self._publish_latest()
+        self._busy = False
+        if self._irq_mode and self.work_pending:
+            self._uart_irq(self.ser)  # budget ran out: queue another ingest pass
+
+    def _queue_report(self, start):
+        """Copies the report frame at ring index start into the next free slot."""
+        n = len(self._reports)
+        if self._rq_count == n:
+            # Queue full: overwrite the oldest report
+            self._rq_head = (self._rq_head + 1) % n
+            self._rq_count -= 1
+            self.frames_dropped += 1
+        idx = (self._rq_head + self._rq_count) % n
+        slot = self._reports[idx]
+        buf = self._buf
+        mask = self._mask
+        for i in range(self.REPORT_FRAME_LEN):
+            slot[i] = buf[(start + i) & mask]
+        self._rq_count += 1
+        self._in_sync = True
+        self.frames_ok += 1
+        self._slot_seq[idx] = self.frames_ok
+        self._slot_ticks[idx] = self._now
+
+        # Effective frame rate, refreshed about once a second
+        self._rate_frames += 1
+        elapsed = time.ticks_diff(self._now, self._rate_start)
+        if elapsed >= 1000000:
+            self.frame_rate = self._rate_frames * 1000000 / elapsed
+            self._rate_frames = 0
+            self._rate_start = self._now
+
+    def _pop_report(self):
+        """
+        Removes and returns the oldest queued report slot (valid until the
+        next _pump), recording its sequence number and arrival time.
+        """
+        idx = self._rq_head
+        frame = self._reports[idx]
+        self.last_report_seq = self._slot_seq[idx]
+        self.last_report_ticks = self._slot_ticks[idx]
+        self._rq_head = (self._rq_head + 1) % len(self._reports)
+        self._rq_count -= 1
+        return frame
+
+    def _skip_stale(self):
+        """Drops every queued report except the newest, counting them as skipped."""
+        stale = self._rq_count - 1
+        if stale > 0:
+            self._rq_head = (self._rq_head + stale) % len(self._reports)
+            self._rq_count = 1
+            self.frames_skipped += stale
+
+    def read_report_into(self, out, pos=0, latest=False):
+        """
+        Decodes a queued report into out[pos:pos + 12] (raw units, see
+        decode_report_into). FIFO by default so logging sees every frame;
+        latest=True decodes only the freshest frame and skips the backlog.
+        Returns True if a report was decoded.
+        """
+        self._acquire()
+        found = self._rq_count > 0
+        if found:
+            if latest:
+                self._skip_stale()
+            decode_report_into(self._pop_report(), out, pos)
+        self._release()
+        return found
+
+    def read_reports_into(self, out, seqs=None, ticks=None):
+        """
+        Batch variant: decodes as many queued reports as fit in out, one
+        12-value block per frame, oldest first. Optional seqs/ticks arrays
+        receive each frame's sequence number and arrival ticks_us.
+        Returns the frame count.
+        """
+        self._acquire()
+        n = min(self._rq_count, len(out) // REPORT_FIELDS)
+        for i in range(n):
+            decode_report_into(self._pop_report(), out, i * REPORT_FIELDS)
+            if seqs is not None:
+                seqs[i] = self.last_report_seq
+            if ticks is not None:
+                ticks[i] = self.last_report_ticks
+        self._release()
+        return n
+
+    def parse_radar_report(self, latest=False):
+        """
+        Returns a queued report as 12 values (x, y, speed, res per target),
+        else None. Oldest first; latest=True returns the freshest frame.
+        """
+        t = self._scratch
+        if not self.read_report_into(t, latest=latest):
+            return None
+        return (t[0] / 10.0, t[1] / 10.0, t[2], t[3] / 10.0,    # cm, cm, cm/s, cm
+                t[4] / 10.0, t[5] / 10.0, t[6], t[7] / 10.0,
+                t[8] / 10.0, t[9] / 10.0, t[10], t[11] / 10.0)
+
+    def report_age_us(self):
+        """Microseconds since the last report read (by any read mode) arrived."""
+        return time.ticks_diff(time.ticks_us(), self.last_report_ticks)
+
+    def get_stats(self):
+        """
+        Returns a snapshot of the pipeline counters. A rate window that ran
+        a second without being closed by a frame is closed here, so a silent
+        sensor reads as 0 fps rather than its last rate.
+        """
+        now = time.ticks_us()
+        elapsed = time.ticks_diff(now, self._rate_start)
+        if elapsed >= 1000000:
+            self.frame_rate = self._rate_frames * 1000000 / elapsed
+            self._rate_frames = 0
+            self._rate_start = now
+        return {
+            "frames_ok": self.frames_ok,
+            "frames_resynced": self.frames_resynced,
+            "frames_skipped": self.frames_skipped,
+            "frames_dropped": self.frames_dropped,
+            "bytes_discarded": self.bytes_discarded,
+            "buffer_overflows": self.buffer_overflows,
+            "frame_rate": self.frame_rate,
+        }
+
+    def reset_stats(self):
+        """Zeroes the counters; the sequence number (frames_ok) keeps counting."""
+        self.frames_resynced = 0
+        self.frames_skipped = 0
+        self.frames_dropped = 0
+        self.bytes_discarded = 0
+        self.buffer_overflows = 0
+        self.frame_rate = 0.0
+        self._rate_frames = 0
+        self._rate_start = time.ticks_us()
+
+    # --- Raw Capture ---
+    def start_capture(self, path):
+        """
+        Records every raw byte read from the UART, with coarse timestamps,
+        to a capture file (see RadarCapture). Replay it with RadarReplay.
+        """
+        from RadarCapture import RadarCapture
+        self.stop_capture()
+        self._capture = RadarCapture(path)
+
+    def stop_capture(self):
+        """Closes the capture file. Returns (records, bytes) written."""
+        cap = self._capture
+        if cap is None:
+            return 0, 0
+        self._capture = None
+        cap.close()
+        return cap.records, cap.bytes
+
+    # --- Background (IRQ) Ingestion ---
+    def start_background(self, trigger=None):
+        """
+        Moves radar bytes in the background. A UART RX interrupt schedules
+        the stream parser with micropython.schedule, so bytes keep flowing
+        while the main loop sleeps or draws. Readers only touch the queues.
+        """
+        if trigger is None:
+            trigger = UART.IRQ_RXIDLE
+        self._irq_mode = True
+        self.ser.irq(handler=self._uart_irq, trigger=trigger, hard=True)
+
+    def stop_background(self):
+        """Returns to polled mode, where each read drains the UART itself."""
+        self.ser.irq(handler=None)
+        self._irq_mode = False
+
+    def _uart_irq(self, uart):
+        """Hard IRQ handler: just queue one ingest pass (no allocation)."""
+        if not self._ingest_scheduled:
+            self._ingest_scheduled = True
+            try:
+                micropython.schedule(self._ingest_ref, 0)
+            except RuntimeError:
+                self._ingest_scheduled = False  # schedule queue full; next IRQ retries
+
+    def _ingest(self, _):
+        """Scheduled callback: parse new bytes and refresh the latest snapshot."""
+        self._ingest_scheduled = False
+        if self._busy:
+            self._ingest_deferred = True  # the reader finishes this on _release
+            return
+        self._pump()
+        self._publish_latest()
+        if self.work_pending:
+            self._uart_irq(self.ser)  # budget ran out: finish on a later pass
+
+    def _publish_latest(self):
+        """Decodes the newest queued report into the latest-frame snapshot."""
+        if self._rq_count and self.frames_ok != self._latest_seq:
+            newest = (self._rq_head + self._rq_count - 1) % len(self._reports)
+            decode_report_into(self._reports[newest], self._latest)
+            self._latest_seq = self._slot_seq[newest]
+            self.latest_ticks = self._slot_ticks[newest]
+
+    def get_latest_report(self, out, pos=0):
+        """
+        Copies the most recent report (raw units) into out[pos:pos + 12]
+        without doing any I/O or consuming the queue. Returns the frame's
+        sequence number, or 0 if no report has arrived yet.
+        """
+        self._acquire()
+        if not self._irq_mode:
+            self._publish_latest()
+        seq = self._latest_seq
+        latest = self._latest
+        for i in range(REPORT_FIELDS):
+            out[pos + i] = latest[i]
+        self._release()
+        return seq
+
+
+class RadarCommand:
+    """Handle for one command sent with XRPRadar.transact."""
+    PENDING = 0
+    DONE = 1
+    FAILED = 2
+
+    def __init__(self, radar, command_word, command_value, timeout_ms, retries):
+        self.radar = radar
+        self.command_word = command_word
+        self.command_value = command_value
+        self.timeout_ms = timeout_ms
+        self.retries = retries
+        self.attempts = 0
+        self.state = self.PENDING
+        self.response = None
+        self._sent_ms = 0
+
+    def _send(self):
+        self.attempts += 1
+        self._sent_ms = time.ticks_ms()
+        self.radar._send_command((2 + len(self.command_value)).to_bytes(2, 'little'),
+                                 self.command_word.to_bytes(2, 'little'),
+                                 self.command_value)
+
+    def _complete(self, ack):
+        self.response = ack
+        self.state = self.DONE if self.radar.get_command_success(ack) else self.FAILED
+
+    def _check_timeout(self, now):
+        if self.state == self.PENDING and time.ticks_diff(now, self._sent_ms) > self.timeout_ms:
+            if self.attempts <= self.retries:
+                self._send()
             else:
-                # Invalid frame - discard up to next header or clear partial
-                self.buffer = self.buffer[start + 4 :]  # skip header, try next
-        return None
\ No newline at end of file
+                self.state = self.FAILED
+
+    @property
+    def success(self):
+        return self.state == self.DONE
+
+    def poll(self):
+        """Advances the transaction. Returns True once it has finished (either way)."""
+        if self.state == self.PENDING:
+            self.radar.update_transactions()
+        return self.state != self.PENDING
+
+    def wait(self):
+        """Blocks until finished (for startup code). Returns success."""
+        while not self.poll():
+            time.sleep_ms(2)
+        return self.success
+
+
+class RadarSequence:
+    """Runs a list of (command_word, value) transactions back to back."""
+    def __init__(self, radar, steps, timeout_ms=200, retries=2):
+        self.radar = radar
+        self.steps = steps
+        self.timeout_ms = timeout_ms
+        self.retries = retries
+        self.index = 0
+        self.state = RadarCommand.PENDING
+        self.responses = []
+        self._cmd = self._start(0)
+
+    def _start(self, i):
+        word, value = self.steps[i]
+        return self.radar.transact(word, value, self.timeout_ms, self.retries)
+
+    @property
+    def success(self):
+        return self.state == RadarCommand.DONE
+
+    def poll(self):
+        """Advances the sequence. Returns True once it has finished (either way)."""
+        if self.state != RadarCommand.PENDING:
+            return True
+        if not self._cmd.poll():
+            return False
+        self.responses.append(self._cmd.response)
+        if not self._cmd.success:
+            self.state = RadarCommand.FAILED
+            if self.steps[0][0] == 0x00FF and self._cmd.command_word != 0x00FE:
+                self.radar.end_configuration_mode()  # don't leave the sensor stuck in config mode
+            return True
+        self.index += 1
+        if self.index == len(self.steps):
+            self.state = RadarCommand.DONE
+            return True
+        self._cmd = self._start(self.index)
+        return False
+
+    def wait(self):
+        """Blocks until finished (for startup code). Returns success."""
+        while not self.poll():
+            time.sleep_ms(2)
+        return self.success
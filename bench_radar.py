@@ -0,0 +1,57 @@
+from XRPRadar import XRPRadar
+import time
+
+# Parser benchmark for XRPRadar - runs on the XRP without the sensor attached.
+# Queues a backlog of N report frames, then times how long it takes to drain
+# them. Per-frame cost should stay flat as the backlog grows.
+
+FRAME = (b'\xaa\xff\x03\x00'
+         b'\x64\x80\xc8\x80\x0a\x80\x50\x00'   # target 1: x=10cm y=20cm s=10 r=8cm
+         b'\x00\x00\x00\x00\x00\x00\x00\x00'
+         b'\x00\x00\x00\x00\x00\x00\x00\x00'
+         b'\x55\xcc')
+
+class BacklogUART:
+    """Pretends a backlog of frames is waiting in the UART FIFO."""
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def any(self):
+        return len(self.data) - self.pos
+
+    def readinto(self, buf):
+        n = min(len(buf), len(self.data) - self.pos)
+        if not n:
+            return None
+        buf[:n] = self.data[self.pos : self.pos + n]
+        self.pos += n
+        return n
+
+    def write(self, data):
+        return len(data)
+
+print("Backlog  Frames  us/frame")
+for depth in (1, 4, 16, 32, 64):
+    uart = BacklogUART(FRAME * depth)
+    radar = XRPRadar(0, 0, 1, buffer_size=4096, uart=uart, report_queue=depth)
+    frames = 0
+    start = time.ticks_us()
+    while radar.parse_radar_report():
+        frames += 1
+    elapsed = time.ticks_diff(time.ticks_us(), start)
+    print(f"{depth * len(FRAME):7d}  {frames:6d}  {elapsed / max(1, frames):8.1f}")
+
+# Replay a field recording (made with XRPRadar.start_capture) at max speed.
+CAPTURE = None  # e.g. '/radar.cap'
+if CAPTURE:
+    from RadarCapture import RadarReplay
+    replay = RadarReplay(CAPTURE, realtime=False)
+    radar = XRPRadar(0, 0, 1, uart=replay)
+    frames = 0
+    start = time.ticks_us()
+    while not replay.finished:
+        if radar.parse_radar_report():
+            frames += 1
+    elapsed = time.ticks_diff(time.ticks_us(), start)
+    print(f"Replay: {frames} frames in {elapsed} us, {radar.get_stats()}")
@@ -0,0 +1,97 @@
+import time
+import math
+
+
+class CollisionGuard:
+    """
+    Time-to-collision braking on top of a RadarTracker. The closing speed is
+    the larger of the nearest track's radial speed (radar speed field) and
+    our own forward speed from the wheel encoders, so both a target walking
+    in and us driving at a wall count. update() turns the TTC into an effort
+    scale: 1 when far, graded down inside slow_ttc_ms, 0 (stop) inside
+    stop_ttc_ms or closer than the static floor. Distances are compared
+    squared in mm, like the tracker.
+    """
+    def __init__(self, drivetrain, tracker, stop_ttc_ms=400, slow_ttc_ms=1500,
+                 min_scale=0.3, speed_window_ms=40):
+        self.drivetrain = drivetrain
+        self.tracker = tracker
+        self.stop_ttc_ms = stop_ttc_ms
+        self.slow_ttc_ms = slow_ttc_ms
+        self.min_scale = min_scale      # slowest cruise before the stop
+        self.speed_window_ms = speed_window_ms  # encoder speed is measured over at least this
+        self.ego_speed = 0              # mm/s forward, from the encoders
+        self.closing = 0                # mm/s towards the nearest track, 0 = not closing
+        self.ttc_ms = -1                # -1 = not closing, or further out than slow_ttc_ms
+        self.scale = 1.0
+        self.reset()
+
+    def reset(self):
+        """Call when a drive starts (encoders reset, robot at rest)."""
+        self._pos = self._position()
+        self._pos_ticks = time.ticks_ms()
+        self.ego_speed = 0
+        self.closing = 0
+        self.ttc_ms = -1
+        self.scale = 1.0
+
+    def reach_cm(self, speed_cm_s, floor_cm=0, margin_cm=10):
+        """
+        How far out targets must be reported for the guard to act at a
+        closing speed of speed_cm_s: the outer edge of the slow band (never
+        inside floor_cm), plus margin_cm so a track exists before braking
+        starts. Use it as the far edge of a sensor-side detect zone.
+        """
+        return max(floor_cm, speed_cm_s * self.slow_ttc_ms / 1000) + margin_cm
+
+    def _position(self):
+        return (self.drivetrain.get_left_encoder_position()
+                + self.drivetrain.get_right_encoder_position()) / 2  # cm
+
+    def _update_ego_speed(self):
+        now = time.ticks_ms()
+        dt = time.ticks_diff(now, self._pos_ticks)
+        if dt < self.speed_window_ms:
+            return
+        pos = self._position()
+        self.ego_speed = int((pos - self._pos) * 10000 / dt)  # cm per ms -> mm/s
+        self._pos = pos
+        self._pos_ticks = now
+
+    def update(self, floor_cm, confirmed=True):
+        """
+        Returns the effort scale for this loop: 0 means stop now. floor_cm is
+        the static minimum distance that stops regardless of speed.
+        """
+        self._update_ego_speed()
+        t = self.tracker
+        i = t.nearest if confirmed else t.nearest_any
+        if i < 0:
+            self.closing = 0
+            self.ttc_ms = -1
+            self.scale = 1.0
+            return self.scale
+        d_sq = t.nearest_sq if confirmed else t.nearest_any_sq
+        floor = floor_cm * 10
+        self.closing = max(-t.speed[i] * 10, self.ego_speed, 0)
+        if d_sq < floor * floor:
+            self.ttc_ms = 0
+            self.scale = 0.0
+            return self.scale
+        if not self.closing:
+            self.ttc_ms = -1
+            self.scale = 1.0
+            return self.scale
+        stop = self.closing * self.stop_ttc_ms // 1000   # mm we cover before stop_ttc
+        slow = self.closing * self.slow_ttc_ms // 1000
+        if d_sq < stop * stop:
+            self.ttc_ms = 0
+            self.scale = 0.0
+        elif d_sq < slow * slow:
+            self.ttc_ms = int(math.sqrt(d_sq) * 1000 / self.closing)  # only inside the slow band
+            frac = (self.ttc_ms - self.stop_ttc_ms) / (self.slow_ttc_ms - self.stop_ttc_ms)
+            self.scale = self.min_scale + (1 - self.min_scale) * frac
+        else:
+            self.ttc_ms = -1
+            self.scale = 1.0
+        return self.scale
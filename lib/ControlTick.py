@@ -0,0 +1,118 @@
+import time
+import machine
+import micropython
+
+
+class ControlTick:
+    """
+    Fixed-rate control loop. A hardware timer fires at rate_hz and its hard
+    IRQ schedules step() with micropython.schedule, so the control code runs
+    on a steady clock instead of after a sleep plus whatever the loop body
+    cost. step() returns False to end the run. Each run keeps period and
+    overrun statistics, which bound the worst-case reaction time.
+    """
+    def __init__(self, rate_hz=100, timer_id=-1, timer=None):
+        self.rate_hz = rate_hz
+        self.period_us = 1000000 // rate_hz
+        self.timer = timer if timer is not None else machine.Timer(timer_id)
+        self.running = False
+        self.error = None           # exception raised by step(), re-raised by wait()
+        self._step = None
+        self._scheduled = False
+        self._run_ref = self._run   # bound once: the IRQ must not allocate
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.ticks = 0
+        self.overruns = 0           # timer fired while the previous step was still queued/running
+        self.period_min_us = 0
+        self.period_max_us = 0
+        self._period_total_us = 0
+        self.exec_max_us = 0
+        self._last_us = 0
+
+    def start(self, step):
+        """Begins calling step() every tick. Returns at once; see wait()."""
+        self.reset_stats()
+        self.error = None
+        self._step = step
+        self._scheduled = False
+        self.running = True
+        self.timer.init(mode=machine.Timer.PERIODIC, freq=self.rate_hz,
+                        callback=self._irq, hard=True)
+
+    def stop(self):
+        self.timer.deinit()
+        self.running = False
+
+    def wait(self, timeout_ms=None):
+        """
+        Blocks until step() ends the run (or timeout_ms passes). Returns True
+        if it ended. Anything raised while waiting, Ctrl-C included, stops
+        the timer first, so step() cannot keep driving after the caller is gone.
+        """
+        start = time.ticks_ms()
+        try:
+            while self.running:
+                if timeout_ms is not None and time.ticks_diff(time.ticks_ms(), start) > timeout_ms:
+                    self.stop()
+                    return False
+                time.sleep_ms(1)  # scheduled steps run between these sleeps
+        except BaseException:
+            self.stop()
+            raise
+        if self.error is not None:
+            raise self.error
+        return True
+
+    def _irq(self, timer):
+        """Hard IRQ: queue one step, or count an overrun if the last has not run yet."""
+        if self._scheduled:
+            self.overruns += 1
+            return
+        self._scheduled = True
+        try:
+            micropython.schedule(self._run_ref, 0)
+        except RuntimeError:
+            self._scheduled = False
+            self.overruns += 1  # schedule queue full
+
+    def _run(self, _):
+        if not self.running:
+            self._scheduled = False
+            return
+        now = time.ticks_us()
+        if self._last_us:
+            period = time.ticks_diff(now, self._last_us)
+            if self.ticks == 1 or period < self.period_min_us:
+                self.period_min_us = period
+            if period > self.period_max_us:
+                self.period_max_us = period
+            self._period_total_us += period
+        self._last_us = now
+        self.ticks += 1
+        try:
+            keep_going = self._step()
+        except Exception as e:
+            self.error = e
+            keep_going = False
+        spent = time.ticks_diff(time.ticks_us(), now)
+        if spent > self.exec_max_us:
+            self.exec_max_us = spent
+        self._scheduled = False
+        if keep_going is False:
+            self.stop()
+
+    def period_mean_us(self):
+        return self._period_total_us // (self.ticks - 1) if self.ticks > 1 else 0
+
+    def get_stats(self):
+        """Timing of the last (or current) run, all in microseconds."""
+        return {
+            "ticks": self.ticks,
+            "period_min_us": self.period_min_us,
+            "period_mean_us": self.period_mean_us(),
+            "period_max_us": self.period_max_us,
+            "exec_max_us": self.exec_max_us,
+            "overruns": self.overruns,
+        }
@@ -0,0 +1,70 @@
+import math
+
+
+class TrapezoidProfile:
+    """
+    Trapezoidal velocity profile over a distance: accelerate at accel up to
+    v_max, cruise, decelerate at decel to v_end. Short moves become
+    triangles. Units are whatever the caller uses (here wheel revolutions
+    and rev/s). at(t) gives the time-indexed setpoint; velocity_at(s) gives
+    the velocity allowed at a measured position, and command(t, s) the
+    velocity to drive with: ramp-up on the clock, ramp-down on the encoders.
+    """
+    def __init__(self, distance, v_max, accel, decel=None, v_start=0.0, v_end=0.0):
+        self.distance = abs(distance)
+        self.accel = accel
+        self.decel = decel or accel
+        self.v_start = min(v_start, v_max)
+        self.v_end = min(v_end, v_max)
+        # Distances needed to reach v_max from either end
+        s_up = (v_max * v_max - self.v_start ** 2) / (2 * self.accel)
+        s_down = (v_max * v_max - self.v_end ** 2) / (2 * self.decel)
+        if s_up + s_down > self.distance:
+            # Triangle: the peak where the two ramps meet
+            v_max = math.sqrt((2 * self.accel * self.decel * self.distance
+                               + self.decel * self.v_start ** 2 + self.accel * self.v_end ** 2)
+                              / (self.accel + self.decel))
+            v_max = max(v_max, self.v_start, self.v_end)
+            s_up = (v_max * v_max - self.v_start ** 2) / (2 * self.accel)
+            s_down = (v_max * v_max - self.v_end ** 2) / (2 * self.decel)
+        self.v_peak = v_max
+        self.s_up = max(0.0, s_up)
+        self.s_cruise = max(0.0, self.distance - s_up - s_down)
+        self.t_up = (v_max - self.v_start) / self.accel
+        self.t_cruise = self.s_cruise / v_max if v_max else 0.0
+        self.t_down = (v_max - self.v_end) / self.decel
+        self.duration = self.t_up + self.t_cruise + self.t_down
+
+    def at(self, t):
+        """(position, velocity) t seconds into the move."""
+        if t <= 0:
+            return 0.0, self.v_start
+        if t < self.t_up:
+            return self.v_start * t + 0.5 * self.accel * t * t, self.v_start + self.accel * t
+        t -= self.t_up
+        if t < self.t_cruise:
+            return self.s_up + self.v_peak * t, self.v_peak
+        t -= self.t_cruise
+        if t < self.t_down:
+            s = self.s_up + self.s_cruise + self.v_peak * t - 0.5 * self.decel * t * t
+            return s, self.v_peak - self.decel * t
+        return self.distance, self.v_end
+
+    def velocity_at(self, s):
+        """Fastest velocity allowed at position s so both ramps are respected."""
+        s = max(0.0, min(self.distance, s))
+        up = math.sqrt(self.v_start ** 2 + 2 * self.accel * s)
+        down = math.sqrt(self.v_end ** 2 + 2 * self.decel * (self.distance - s))
+        return min(self.v_peak, up, down)
+
+    def command(self, t, s):
+        """
+        Velocity to command t seconds in, at measured position s. Only the
+        ramp-up runs on the clock; cruise and ramp-down follow the measured
+        position, so a robot slower than planned keeps cruising until it is
+        actually near the target instead of creeping once duration is up.
+        There is no position-based ramp-up, so v_start = 0 still gets moving.
+        """
+        s = max(0.0, min(self.distance, s))
+        down = math.sqrt(self.v_end ** 2 + 2 * self.decel * (self.distance - s))
+        return min(self.v_start + self.accel * max(0.0, t), self.v_peak, down)
@@ -1,71 +1,142 @@
-from XRPLib.defaults import *
 import time
 import math
+from array import array
+from OccupancyGrid import OccupancyGrid
+from PoseEstimator import PoseEstimator
 class ObstacleAvoider:
     """Class to make the robot go forward 500 cm (5m), avoiding obstacles."""
-    def __init__(self, drivetrain, hlk_radar, target_distance=500, avoid_threshold=50, max_time=60):
+    DRIVE = 0
+    TURN = 1
+
+    def __init__(self, drivetrain, radar, imu=None, pose=None, target_distance=500, avoid_threshold=50, max_time=60,
+                 log=None):
         self.drivetrain = drivetrain
-        self.hlk_radar = hlk_radar
+        self.log = log or (lambda msg: None)  # e.g. xrp.py's add_log
+        self.radar = radar  # RadarService
+        self.imu = imu  # turns end on its yaw; encoder heading without one
+        # Shared (timer-driven) pose if given, else one this class steps itself
+        self.pose = pose if pose is not None else PoseEstimator(drivetrain, imu)
+        self._pose = array('f', [0.0] * PoseEstimator.FIELDS)
         self.target_distance = target_distance  # cm
         self.avoid_threshold = avoid_threshold  # cm (stop/turn if closer)
         self.max_time = max_time  # seconds timeout
         self.base_speed = 0.6
-        self.turn_speed = 0.5
-        self.turn_time = 1.0  # seconds to turn when avoiding
+        self.turn_speed = 0.5      # max effort while turning
+        self.turn_min_speed = 0.25  # effort floor so small turns still move
+        self.turn_gain = 0.01      # effort per degree of remaining turn
+        self.turn_tolerance = 3.0  # degrees
+        self.turn_timeout = 3000   # ms - give up on a turn that does not finish
+        self.state = self.DRIVE
+        self._turn_target = 0.0
+        self._turn_start = 0
+        # Obstacles seen so far, in the start frame; picks the freest way round
+        self.grid = OccupancyGrid(width_cm=300, length_cm=target_distance + 100)
+        self.x = 0.0  # cm, latest pose snapshot
+        self.y = 0.0
+        self.heading = 0.0  # radians, counter-clockwise
 
     def get_obstacle_distance(self):
-        # Reuse your get_radar_distance() or rangefinder if available
-        report = self.hlk_radar.parse_radar_report()
-        if report:
-            min_dist = float('inf')
-            for i in range(0, len(report), 4):
-                x, y, speed, res = report[i:i+4]
-                if res > 0 and (x != 0 or y != 0):
-                    dist = math.sqrt(x**2 + y**2)
-                    if dist < min_dist:
-                        min_dist = dist
-            if min_dist != float('inf'):
-                return min_dist
-        return 65535
+        return self.radar.get_distance()
 
-    def run(self):
-        add_log("Starting 5m obstacle avoid...")
-        start_time = time.ticks_ms()
-        traveled = 0.0  # track with encoders
+    def update_pose(self):
+        """Takes a snapshot of the pose (stepping it here if no timer drives it)."""
+        if not self.pose.running:
+            self.pose.update(0.02)
+        p = self.pose.snapshot(self._pose)
+        self.x = p[PoseEstimator.X]
+        self.y = p[PoseEstimator.Y]
+        self.heading = p[PoseEstimator.THETA]
 
-        # Reset encoders
-        try:
-            self.drivetrain.left_motor.reset_relative_position()
-            self.drivetrain.right_motor.reset_relative_position()
-        except AttributeError:
-            self.drivetrain.left_motor.reset_encoder_position()
-            self.drivetrain.right_motor.reset_encoder_position()
+    def choose_turn(self):
+        """Degrees to turn (positive = left) towards the freest sector of the grid."""
+        turn, free = self.grid.freest_sector(self.x, self.y, self.heading)
+        self.log(f"Turn {turn:.0f} deg, {free:.0f} cm free")
+        return turn
 
-        while traveled < self.target_distance:
-            if time.ticks_diff(time.ticks_ms(), start_time) > self.max_time * 1000:
-                add_log("Timeout reached. Stopping.")
-                break
+    def get_yaw(self):
+        """Counter-clockwise yaw in degrees, from the IMU if there is one."""
+        if self.imu is not None:
+            return self.imu.get_yaw()
+        return math.degrees(self.heading)
 
-            dist = self.get_obstacle_distance()
-            if dist < self.avoid_threshold and dist != 65535:
-                add_log(f"Obstacle at {dist:.1f} cm - avoiding...")
-                self.drivetrain.stop()
-                # Random turn left or right
-                direction = random.choice([-1, 1])  # -1 left, 1 right
-                self.drivetrain.set_effort(direction * self.turn_speed, -direction * self.turn_speed)
-                time.sleep(self.turn_time)
-                self.drivetrain.stop()
-            else:
-                # Go forward
-                self.drivetrain.set_effort(self.base_speed, self.base_speed)
-                time.sleep(0.05)
+    def start_turn(self, degrees):
+        """Enters the TURN state towards the current yaw + degrees (positive = left)."""
+        self._turn_target = self.get_yaw() + degrees
+        self._turn_start = time.ticks_ms()
+        self.state = self.TURN
+
+    def update_turn(self):
+        """One step of the turn: sets the efforts, returns True once it is done."""
+        remaining = self._turn_target - self.get_yaw()
+        if abs(remaining) <= self.turn_tolerance:
+            return True
+        if time.ticks_diff(time.ticks_ms(), self._turn_start) > self.turn_timeout:
+            self.log("Turn timed out")
+            return True
+        # Slow down into the target angle instead of coasting past it
+        effort = max(self.turn_min_speed, min(self.turn_speed, self.turn_gain * abs(remaining)))
+        if remaining > 0:
+            self.drivetrain.set_effort(-effort, effort)  # left (counter-clockwise)
+        else:
+            self.drivetrain.set_effort(effort, -effort)
+        return False
+
+    def start(self):
+        """Begins a run; call update() every 10-50 ms until it returns False."""
+        self.log("Starting 5m obstacle avoid...")
+        self._start = time.ticks_ms()
 
-            # Update traveled (average encoders)
-            left_pos = abs(self.drivetrain.left_motor.get_position())
-            right_pos = abs(self.drivetrain.right_motor.get_position())
-            traveled = (left_pos + right_pos) / 2.0  # assuming cm units from XRPLib
+        # The run's start pose is the origin of the grid
+        self.pose.reset()
+        self.grid.clear()
+        self.x = self.y = self.heading = 0.0
+        self.state = self.DRIVE
 
-            add_log(f"Traveled: {traveled:.1f} cm")
+    def update(self):
+        """
+        One loop of the run, without sleeping. Returns False (and stops the
+        robot) once the goal is reached or the run has timed out, True while
+        it goes on.
+        """
+        if time.ticks_diff(time.ticks_ms(), self._start) > self.max_time * 1000:
+            self.log("Timeout reached. Stopping.")
+            return self._finish()
 
+        self.update_pose()
+        if self.radar.update():
+            self.grid.mark_frame(self.radar.frame, self.x, self.y, self.heading)
+        self.grid.decay()
+        if self.state == self.TURN:
+            # Radar and encoders keep being read while the turn runs
+            if self.update_turn():
+                self.drivetrain.stop()
+                self.state = self.DRIVE
+        elif self.radar.within(self.avoid_threshold):  # squared mm compare
+            self.log(f"Obstacle at {self.radar.get_distance():.1f} cm - avoiding...")
+            self.drivetrain.stop()
+            # Turn towards the side the grid says is clearest
+            self.start_turn(self.choose_turn())
+        else:
+            # Go forward
+            self.drivetrain.set_effort(self.base_speed, self.base_speed)
+
+        # Only distance along the goal direction counts; turning in place
+        # and detours sideways do not
+        traveled = self.y
+        if self.state == self.DRIVE:
+            self.log(f"Traveled: {traveled:.1f} cm")
+        if traveled >= self.target_distance:
+            return self._finish()
+        return True
+
+    def _finish(self):
         self.drivetrain.stop()
-        add_log("5m destination reached.")
\ No newline at end of file
+        self.log("5m destination reached.")
+        return False
+
+    def run(self):
+        """Drives until the goal or the timeout. Blocks; a scheduler calls start()/update() instead."""
+        self.start()
+        while self.update():
+            # Turns are stepped faster so they stop close to the target angle
+            time.sleep(0.01 if self.state == self.TURN else 0.05)
@@ -0,0 +1,113 @@
+import time
+import math
+
+
+class OccupancyGrid:
+    """
+    Fixed-size Cartesian occupancy grid in the world frame (x right, y
+    forward at the start pose, cm). Each cell is one byte of evidence in a
+    preallocated bytearray; radar hits add to it and it fades over time, so
+    obstacles that moved away clear on their own.
+    """
+    HIT = 64          # evidence added per radar detection
+    OCCUPIED = 64     # cells at or above this block a ray
+
+    def __init__(self, width_cm=300, length_cm=600, cell_cm=10,
+                 origin_x_cm=150, origin_y_cm=50, decay=16, decay_ms=250):
+        self.cell = cell_cm
+        self.cols = width_cm // cell_cm
+        self.rows = length_cm // cell_cm
+        self.origin_x = origin_x_cm   # world (0, 0) sits this far into the grid
+        self.origin_y = origin_y_cm
+        self.cells = bytearray(self.cols * self.rows)
+        self.decay_step = decay
+        self.decay_ms = decay_ms
+        self._last_decay = time.ticks_ms()
+
+    def clear(self):
+        for i in range(len(self.cells)):
+            self.cells[i] = 0
+        self._last_decay = time.ticks_ms()
+
+    def _index(self, x, y):
+        """Cell index for world (x, y) cm, or -1 outside the grid."""
+        col = int(x + self.origin_x) // self.cell
+        row = int(y + self.origin_y) // self.cell
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return row * self.cols + col
+        return -1
+
+    def mark(self, x, y, hit=HIT):
+        i = self._index(x, y)
+        if i >= 0:
+            self.cells[i] = min(255, self.cells[i] + hit)
+
+    def value(self, x, y):
+        """Evidence at world (x, y) cm; 0 outside the grid (unknown counts as free)."""
+        i = self._index(x, y)
+        return self.cells[i] if i >= 0 else 0
+
+    def mark_frame(self, frame, px, py, heading, min_mm=100):
+        """
+        Adds one decoded radar frame (mm in the robot frame, any number of
+        target blocks) seen from pose (px, py) cm, heading radians
+        counter-clockwise.
+        Detections closer than min_mm are treated as noise.
+        """
+        c = math.cos(heading)
+        s = math.sin(heading)
+        min_sq = min_mm * min_mm
+        for i in range(0, len(frame), 4):
+            sx = frame[i]
+            sy = frame[i + 1]
+            if frame[i + 3] <= 0 or sx * sx + sy * sy < min_sq:
+                continue  # empty slot or ghost
+            sx /= 10
+            sy /= 10
+            self.mark(px + c * sx - s * sy, py + s * sx + c * sy)
+
+    def decay(self):
+        """Fades every cell by decay_step once per decay_ms. Call it from the control loop."""
+        now = time.ticks_ms()
+        if time.ticks_diff(now, self._last_decay) < self.decay_ms:
+            return False
+        self._last_decay = now
+        step = self.decay_step
+        cells = self.cells
+        for i in range(len(cells)):
+            v = cells[i]
+            if v:
+                cells[i] = v - step if v > step else 0
+        return True
+
+    def free_distance(self, px, py, angle, max_cm):
+        """Free run in cm from (px, py) along world angle (radians, 0 = +y, CCW positive)."""
+        dx = -math.sin(angle)
+        dy = math.cos(angle)
+        step = self.cell / 2  # half a cell so diagonal rays do not jump over one
+        d = step
+        while d <= max_cm:
+            if self.value(px + dx * d, py + dy * d) >= self.OCCUPIED:
+                return d
+            d += step
+        return max_cm
+
+    def freest_sector(self, px, py, heading, sectors=6, fov_deg=180, max_cm=150):
+        """
+        Splits fov_deg around the heading into sectors and returns
+        (turn_deg, free_cm) for the one with the longest free run, turn_deg
+        counter-clockwise (positive = left). On a tie the smaller turn wins.
+        With an even number of sectors, straight ahead is never an option.
+        """
+        width = fov_deg / sectors
+        best_turn = 0.0
+        best_free = -1
+        # Visit sectors from the centre outwards so ties keep the smaller turn
+        order = sorted(range(sectors), key=lambda k: abs(k - (sectors - 1) / 2))
+        for k in order:
+            turn = -fov_deg / 2 + width * (k + 0.5)
+            free = self.free_distance(px, py, heading + math.radians(turn), max_cm)
+            if free > best_free:
+                best_turn = turn
+                best_free = free
+        return best_turn, best_free
@@ -0,0 +1,69 @@
+class PIDController:
+    """
+    PID loop with anti-windup and a filtered derivative. The output is
+    clamped to [out_min, out_max]; while it is saturated the integral may
+    only move back towards zero, and it is always held within i_limit.
+    The derivative of the error is low-passed (d_alpha, 1 = no filter), or
+    taken from a measured rate passed to update() (e.g. the gyro).
+    """
+    def __init__(self, kp, ki=0.0, kd=0.0, out_min=-1.0, out_max=1.0,
+                 i_limit=None, d_alpha=0.3):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.out_min = out_min
+        self.out_max = out_max
+        self.i_limit = i_limit      # bound on the integral term's contribution, None = out range
+        self.d_alpha = d_alpha
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.output = 0.0
+        self._prev_error = 0.0
+        self._d_error = 0.0
+        self._first = True
+
+    def set_gains(self, kp=None, ki=None, kd=None):
+        if kp is not None:
+            self.kp = kp
+        if ki is not None:
+            self.ki = ki
+        if kd is not None:
+            self.kd = kd
+
+    def update(self, error, dt, d_error=None):
+        """
+        One step dt seconds after the last. d_error, if given, is the
+        error's rate of change measured directly and replaces the filtered
+        difference. Returns the clamped output.
+        """
+        if d_error is None:
+            if self._first or dt <= 0:
+                raw = 0.0
+            else:
+                raw = (error - self._prev_error) / dt
+            self._d_error += self.d_alpha * (raw - self._d_error)
+            d_error = self._d_error
+        self._prev_error = error
+        self._first = False
+
+        integral = self.integral + error * dt
+        if self.ki:
+            limit = self.i_limit if self.i_limit is not None else max(-self.out_min, self.out_max)
+            bound = limit / abs(self.ki)
+            integral = max(-bound, min(bound, integral))
+
+        out = self.kp * error + self.ki * integral + self.kd * d_error
+        if out > self.out_max:
+            out = self.out_max
+            if integral < self.integral:
+                self.integral = integral  # only unwind while saturated high
+        elif out < self.out_min:
+            out = self.out_min
+            if integral > self.integral:
+                self.integral = integral
+        else:
+            self.integral = integral
+        self.output = out
+        return out
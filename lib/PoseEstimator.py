@@ -0,0 +1,116 @@
+import math
+from array import array
+from ControlTick import ControlTick
+
+
+class PoseEstimator:
+    """
+    Differential-drive odometry. Integrates both wheel encoders at a fixed
+    rate into x, y (cm, x right / y forward at the reset pose) and theta
+    (radians, counter-clockwise). With an IMU, theta is pulled towards the
+    gyro yaw each step, which keeps wheel slip out of the heading. The state
+    lives in one preallocated float array; readers copy it with snapshot().
+    """
+    X = 0
+    Y = 1
+    THETA = 2
+    V = 3          # cm/s forward
+    W = 4          # rad/s counter-clockwise
+    FORWARD = 5    # cm driven forward (reversing subtracts, turning in place adds nothing)
+    PATH = 6       # cm travelled by the centre, any direction
+    FIELDS = 7
+
+    def __init__(self, drivetrain, imu=None, rate_hz=100, imu_weight=0.05,
+                 track_cm=None, timer=None):
+        self.drivetrain = drivetrain
+        self.imu = imu
+        self.imu_weight = imu_weight  # per-step pull of theta towards the gyro yaw
+        self.track = track_cm or getattr(drivetrain, 'track_width', 15.5)
+        self.rate_hz = rate_hz
+        self.state = array('f', [0.0] * self.FIELDS)
+        self.seq = 0               # odd while an update is being written
+        self._view = array('f', [0.0] * self.FIELDS)
+        self._tick = None
+        self._timer = timer
+        self.reset()
+
+    def reset(self, x=0.0, y=0.0, theta=0.0):
+        """
+        Puts the robot at (x, y, theta) and re-reads the encoder/IMU
+        baselines. Safe while the timer runs: the tick is stopped around
+        it, so no update() can land between the state and the baselines.
+        """
+        running = self.running
+        if running:
+            self._tick.stop()
+        self.seq += 1
+        s = self.state
+        for i in range(self.FIELDS):
+            s[i] = 0.0
+        s[self.X] = x
+        s[self.Y] = y
+        s[self.THETA] = theta
+        self._left = self.drivetrain.get_left_encoder_position()
+        self._right = self.drivetrain.get_right_encoder_position()
+        self._yaw0 = math.radians(self.imu.get_yaw()) - theta if self.imu else 0.0
+        self.seq += 1
+        if running:
+            self._tick.start(self.update)
+
+    def update(self, dt=None):
+        """One odometry step, dt seconds after the last (defaults to the tick period)."""
+        dt = dt or 1 / self.rate_hz
+        left = self.drivetrain.get_left_encoder_position()
+        right = self.drivetrain.get_right_encoder_position()
+        dl = left - self._left
+        dr = right - self._right
+        self._left = left
+        self._right = right
+
+        s = self.state
+        self.seq += 1
+        d = (dl + dr) / 2
+        theta = s[self.THETA]
+        dtheta = (dr - dl) / self.track
+        mid = theta + dtheta / 2
+        s[self.X] -= d * math.sin(mid)
+        s[self.Y] += d * math.cos(mid)
+        theta += dtheta
+        if self.imu:
+            theta += self.imu_weight * (math.radians(self.imu.get_yaw()) - self._yaw0 - theta)
+        s[self.THETA] = theta
+        s[self.V] = d / dt
+        s[self.W] = dtheta / dt
+        s[self.FORWARD] += d
+        s[self.PATH] += abs(d)
+        self.seq += 1
+        return True
+
+    def start(self):
+        """Runs update() off a timer at rate_hz from now on."""
+        if self._tick is None:
+            self._tick = ControlTick(self.rate_hz, timer=self._timer)
+        self._tick.start(self.update)
+
+    def stop(self):
+        if self._tick is not None:
+            self._tick.stop()
+
+    @property
+    def running(self):
+        return self._tick is not None and self._tick.running
+
+    def snapshot(self, out):
+        """Copies the whole state into out (FIELDS floats) without tearing. Returns out."""
+        s = self.state
+        while True:
+            seq = self.seq
+            for i in range(self.FIELDS):
+                out[i] = s[i]
+            if not seq & 1 and seq == self.seq:
+                return out
+
+    def get_pose(self):
+        """(x_cm, y_cm, heading_deg) for display and logging."""
+        s = self.snapshot(self._view)
+        return s[self.X], s[self.Y], math.degrees(s[self.THETA])
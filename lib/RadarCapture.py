@@ -0,0 +1,120 @@
+import struct
+import time
+
+# Capture file layout:
+#   b'LDCAP1'                      magic
+#   repeated records:
+#     <HH  delta_ms, length        ms since the previous record (saturates at 65535)
+#     length raw UART bytes
+MAGIC = b'LDCAP1'
+_RECORD = '<HH'
+
+
+class RadarCapture:
+    """Writes a raw LD2450 byte stream with coarse timestamps to a file."""
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC)
+        self.records = 0
+        self.bytes = 0
+        self._last_ms = time.ticks_ms()
+
+    def write(self, data):
+        """Appends one chunk of UART bytes as a record."""
+        now = time.ticks_ms()
+        delta = min(65535, max(0, time.ticks_diff(now, self._last_ms)))
+        self._last_ms = now
+        self.file.write(struct.pack(_RECORD, delta, len(data)))
+        self.file.write(data)
+        self.records += 1
+        self.bytes += len(data)
+
+    def close(self):
+        self.file.close()
+
+
+class RadarReplay:
+    """
+    UART stand-in that plays a capture file back through XRPRadar, either
+    at the recorded pace (realtime=True) or as fast as it is read.
+    Pass it as XRPRadar(..., uart=RadarReplay(path)).
+    """
+    def __init__(self, path, realtime=True, loop=False):
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.finished = False
+        self._pending = b''      # bytes released to the reader
+        self._pos = 0
+        self._open()
+
+    def _open(self):
+        self.file = open(self.path, 'rb')
+        if self.file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Not a radar capture file")
+        self._start_ms = time.ticks_ms()
+        self._due_ms = 0         # recording time of the next record
+        self._next = self._read_record()
+
+    def _read_record(self):
+        head = self.file.read(4)
+        if len(head) < 4:
+            return None
+        delta, length = struct.unpack(_RECORD, head)
+        self._due_ms += delta
+        return self.file.read(length)
+
+    def _release(self):
+        """Moves every record whose time has come into the pending bytes."""
+        if self._pos < len(self._pending):
+            return
+        chunks = []
+        elapsed = time.ticks_diff(time.ticks_ms(), self._start_ms)
+        while self._next is not None and (not self.realtime or self._due_ms <= elapsed):
+            chunks.append(self._next)
+            self._next = self._read_record()
+            if not self.realtime:
+                break  # max speed: one recorded chunk per read, as it arrived
+        if self._next is None and not chunks:
+            self.file.close()
+            if self.loop:
+                self._open()
+            else:
+                self.finished = True
+        self._pending = b''.join(chunks)
+        self._pos = 0
+
+    def any(self):
+        if not self.finished:
+            self._release()
+        return len(self._pending) - self._pos
+
+    def readinto(self, buf, nbytes=None):
+        n = self.any()
+        if nbytes is not None:
+            n = min(n, nbytes)
+        n = min(n, len(buf))
+        if not n:
+            return None
+        buf[:n] = self._pending[self._pos : self._pos + n]
+        self._pos += n
+        return n
+
+    def read(self, nbytes=None):
+        n = self.any()
+        if nbytes is not None:
+            n = min(n, nbytes)
+        if not n:
+            return None
+        data = self._pending[self._pos : self._pos + n]
+        self._pos += n
+        return data
+
+    def write(self, data):
+        return len(data)  # commands go nowhere during replay
+
+    def init(self, *args, **kwargs):
+        pass
+
+    def irq(self, *args, **kwargs):
+        pass
@@ -1,79 +1,106 @@
 import time
 import math
+from PIDController import PIDController
 
 class RadarFollower:
-    """Class to make the robot follow the closest radar target at ~100 cm distance."""
-    def __init__(self, drivetrain, hlk_radar, imu=None, threshold=100, buffer=5, max_time=30):
+    """
+    Class to make the robot follow the closest radar target at ~100 cm distance.
+    Forward effort comes from a PID on the distance error, steering from a PID
+    on the target bearing damped by the IMU yaw rate (when an imu is given).
+    """
+    def __init__(self, drivetrain, radar, imu=None, threshold=100, buffer=5, max_time=30,
+                 dist_gains=(0.02, 0.001, 0.002), steer_gains=(0.012, 0.002, 0.0015), log=None):
         self.drivetrain = drivetrain
-        self.hlk_radar = hlk_radar
-        self.imu = imu  # Optional for better heading control
+        self.log = log or (lambda msg: None)  # e.g. xrp.py's add_log
+        self.radar = radar  # RadarService
+        self.imu = imu  # Optional: yaw rate damps the steering
         self.threshold = threshold  # cm
-        self.buffer = buffer  # hysteresis to avoid jitter
+        self.buffer = buffer  # cm - within this of threshold counts as holding (for the log)
         self.max_time = max_time  # seconds to run before timeout
-        self.base_speed = 0.5  # effort (0-1)
-        self.turn_gain = 0.002  # steer based on lateral X (higher = sharper turns)
+        self.base_speed = 0.5  # effort (0-1) - forward/back limit
+        self.max_steer = 0.4   # effort - steering limit
         self.search_spin = 0.3  # slow spin when no target
+        # Gains are per instance; retune with self.dist_pid.set_gains(...)
+        # (the integral only needs to overcome motor deadband, hence i_limit)
+        self.dist_pid = PIDController(*dist_gains, out_min=-self.base_speed, out_max=self.base_speed, i_limit=0.15)
+        self.steer_pid = PIDController(*steer_gains, out_min=-self.max_steer, out_max=self.max_steer, i_limit=0.15)
 
     def get_closest_target(self):
-        report = self.hlk_radar.parse_radar_report()
-        if report:
-            min_dist = float('inf')
-            closest = None
-            for i in range(0, len(report), 4):
-                x, y, speed, res = report[i:i+4]
-                if res > 0 and (x != 0 or y != 0):
-                    dist = math.sqrt(x**2 + y**2)
-                    if dist < min_dist:
-                        min_dist = dist
-                        closest = (x, y, speed, res)
-            return closest, min_dist
-        return None, 65535
+        return self.radar.get_closest_target()
 
-    def run(self):
-        add_log("Starting radar follow...")
-        start_time = time.ticks_ms()
-        while True:
-            target, dist = self.get_closest_target()
-            
-            if time.ticks_diff(time.ticks_ms(), start_time) > self.max_time * 1000:
-                add_log("Timeout reached. Stopping.")
-                break
+    def get_yaw_rate(self):
+        """Counter-clockwise yaw rate in deg/s, or None without an imu."""
+        if self.imu is None:
+            return None
+        return self.imu.get_gyro_z_rate() / 1000.0  # mdps -> deg/s
 
-            if dist == 65535:  # no target
-                # Spin slowly to search
-                self.drivetrain.set_effort(self.search_spin, -self.search_spin)
-                add_log("No target - searching...")
-            else:
-                x, y, speed, res = target
-                if dist > self.threshold + self.buffer:  # too far - follow
-                    # Steer based on X (lateral): positive X = turn right (reduce left effort)
-                    steer = self.turn_gain * x
-                    left_eff = self.base_speed - steer
-                    right_eff = self.base_speed + steer
-                    # Clamp efforts to 0-1
-                    left_eff = max(0.1, min(1.0, left_eff))
-                    right_eff = max(0.1, min(1.0, right_eff))
-                    self.drivetrain.set_effort(left_eff, right_eff)
-                    add_log(f"Following: dist={dist:.1f} cm, x={x:.1f}")
-                elif dist < self.threshold - self.buffer:  # too close - back away
-                    # Back straight or slight steer away from X
-                    steer = self.turn_gain * x
-                    left_eff = -self.base_speed + steer
-                    right_eff = -self.base_speed - steer
-                    left_eff = max(-1.0, min(-0.1, left_eff))
-                    right_eff = max(-1.0, min(-0.1, right_eff))
-                    self.drivetrain.set_effort(left_eff, right_eff)
-                    add_log(f"Backing away: dist={dist:.1f} cm, x={x:.1f}")
-                else:  # perfect distance - stop
-                    self.drivetrain.stop()
-                    add_log(f"Maintaining distance: {dist:.1f} cm")
+    def step(self, dist, bearing, dt_frame, dt, new_frame):
+        """
+        One control update: dist (cm) and bearing (deg, + = right) of the
+        target. The distance loop only advances on a new radar frame
+        (dt_frame since the previous one); steering runs every loop (dt).
+        Returns (left, right) efforts.
+        """
+        if new_frame:
+            self.dist_pid.update(dist - self.threshold, dt_frame)  # + = too far, drive forward
+        # A target fixed in the world drifts in bearing at exactly our yaw
+        # rate, so the gyro is the bearing error's derivative, unfiltered
+        steer = self.steer_pid.update(bearing, dt, self.get_yaw_rate())
+        forward = self.dist_pid.output
+        return forward + steer, forward - steer
 
-            # Optional: Use IMU to maintain heading if drifting (if imu provided)
-            if self.imu:
-                heading = self.imu.get_heading()
-                # Add heading correction if needed (e.g., PID to target heading)
+    def start(self):
+        """Begins a follow run; call update() every ~50 ms until it returns False."""
+        self.log("Starting radar follow...")
+        self.dist_pid.reset()
+        self.steer_pid.reset()
+        self._searching = None
+        self._start = self._last = self._last_frame = self._last_log = time.ticks_ms()
 
-            time.sleep(0.05)  # 20 Hz loop
+    def update(self):
+        """
+        One loop of the follow, without sleeping. Returns False (and stops
+        the robot) once the run has timed out, True while it goes on.
+        """
+        radar = self.radar
+        now = time.ticks_ms()
+        dt = time.ticks_diff(now, self._last) / 1000
+        self._last = now
+        new_frame = radar.update()
+
+        if time.ticks_diff(now, self._start) > self.max_time * 1000:
+            self.log("Timeout reached. Stopping.")
+            self.drivetrain.stop()
+            self.log("Radar follow complete.")
+            return False
 
-        self.drivetrain.stop()
-        add_log("Radar follow complete.")
\ No newline at end of file
+        if radar.closest < 0:  # no target
+            # Spin slowly to search; start the loops fresh on reacquire
+            self.drivetrain.set_effort(self.search_spin, -self.search_spin)
+            if self._searching is not True:
+                self.log("No target - searching...")
+                self.dist_pid.reset()
+                self.steer_pid.reset()
+            self._searching = True
+        else:
+            x = radar.frame[radar.closest]      # lateral, mm
+            y = radar.frame[radar.closest + 1]  # forward, mm
+            dist = radar.get_distance()
+            bearing = math.degrees(math.atan2(x, y))
+            dt_frame = time.ticks_diff(now, self._last_frame) / 1000
+            if new_frame:
+                self._last_frame = now
+            left, right = self.step(dist, bearing, dt_frame, dt, new_frame)
+            self.drivetrain.set_effort(max(-1.0, min(1.0, left)), max(-1.0, min(1.0, right)))
+            if self._searching is not False or time.ticks_diff(now, self._last_log) > 1000:
+                state = "Holding" if abs(dist - self.threshold) <= self.buffer else "Following"
+                self.log(f"{state}: dist={dist:.1f} cm, brg={bearing:.0f}")
+                self._last_log = now
+            self._searching = False
+        return True
+
+    def run(self):
+        """Follows until the timeout. Blocks; a scheduler calls start()/update() instead."""
+        self.start()
+        while self.update():
+            time.sleep(0.05)  # 20 Hz loop
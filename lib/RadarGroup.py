@@ -0,0 +1,96 @@
+import time
+import math
+from array import array
+from XRPRadar import REPORT_FIELDS
+
+
+class RadarGroup:
+    """
+    Drives several XRPRadar sensors (front, rear, angled...) as one.
+    Each sensor's targets are moved into the robot frame (x right, y forward,
+    mm) and merged into a single preallocated target set per read. The
+    mounting rotation is fixed point (1/4096ths), so the set is integer
+    throughout. The group reads like one XRPRadar (read_report_into,
+    last_report_seq, last_report_ticks), so a RadarService can sit on top
+    of it and answer the closest-obstacle queries over the fused set.
+    """
+    TARGETS_PER_SENSOR = 3
+    ROT_SHIFT = 12  # mounting cos/sin in Q12
+
+    def __init__(self, max_sensors=2, max_age_ms=150):
+        self.max_age_us = max_age_ms * 1000  # older frames are left out of the fused set
+        self.sensors = []  # [radar, cos(yaw) Q12, sin(yaw) Q12, x_mm, y_mm]
+        self._frames = [array('h', [0] * REPORT_FIELDS) for _ in range(max_sensors)]
+        self._ticks = [0] * max_sensors
+        self._have = [False] * max_sensors
+
+        self.fields = max_sensors * REPORT_FIELDS  # length of the fused frame
+        self.source = bytearray(max_sensors * self.TARGETS_PER_SENSOR)  # sensor index per fused slot
+        self.count = 0
+        self.last_report_seq = 0     # counts fused frames
+        self.last_report_ticks = 0   # arrival ticks_us of the newest frame in the set
+
+    def add(self, radar, x_cm=0.0, y_cm=0.0, yaw_deg=0.0):
+        """
+        Registers a sensor mounted at (x_cm, y_cm) on the robot, facing
+        yaw_deg counter-clockwise from straight ahead (180 = rear).
+        """
+        if len(self.sensors) == len(self._frames):
+            raise ValueError("RadarGroup is full")
+        yaw = math.radians(yaw_deg)
+        one = 1 << self.ROT_SHIFT
+        self.sensors.append([radar, int(round(math.cos(yaw) * one)), int(round(math.sin(yaw) * one)),
+                             int(round(x_cm * 10)), int(round(y_cm * 10))])
+        return len(self.sensors) - 1
+
+    def start_background(self):
+        for sensor in self.sensors:
+            sensor[0].start_background()
+
+    def read_report_into(self, out, pos=0, latest=True):
+        """
+        Pulls the freshest frame from every sensor and, if any was new,
+        writes the fused set into out[pos:pos + fields] in the frame layout
+        (x, y, speed, res per target; x/y in robot-frame mm), unused slots
+        zeroed. Targets from frames older than max_age_ms are dropped, so
+        the set is time-aligned. This group is the only reader of its
+        sensors; latest is accepted for XRPRadar compatibility and always
+        on. Returns True if the set was rebuilt.
+        """
+        fresh = False
+        for s in range(len(self.sensors)):
+            radar = self.sensors[s][0]
+            if radar.read_report_into(self._frames[s], latest=True):
+                self._ticks[s] = radar.last_report_ticks
+                self._have[s] = True
+                if not fresh or time.ticks_diff(self._ticks[s], self.last_report_ticks) > 0:
+                    self.last_report_ticks = self._ticks[s]
+                fresh = True
+        if not fresh:
+            return False
+
+        now = time.ticks_us()
+        shift = self.ROT_SHIFT
+        n = 0
+        for s in range(len(self.sensors)):
+            if not self._have[s] or time.ticks_diff(now, self._ticks[s]) > self.max_age_us:
+                continue
+            _, c, si, mx, my = self.sensors[s]
+            frame = self._frames[s]
+            for i in range(0, REPORT_FIELDS, 4):
+                if frame[i + 3] <= 0 or (frame[i] == 0 and frame[i + 1] == 0):
+                    continue  # empty slot
+                sx = frame[i]
+                sy = frame[i + 1]
+                o = pos + 4 * n
+                out[o] = ((c * sx - si * sy) >> shift) + mx
+                out[o + 1] = ((si * sx + c * sy) >> shift) + my
+                out[o + 2] = frame[i + 2]
+                out[o + 3] = frame[i + 3]
+                self.source[n] = s
+                n += 1
+        for i in range(pos + 4 * n, pos + self.fields):
+            out[i] = 0
+        self.count = n
+        self.last_report_seq += 1
+        return True
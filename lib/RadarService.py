@@ -0,0 +1,122 @@
+import time
+import math
+from array import array
+from XRPRadar import REPORT_FIELDS
+
+
+class RadarService:
+    """
+    Single reader of an XRPRadar, or of a RadarGroup whose fused
+    robot-frame set then stands in for the frame. Each new frame is decoded
+    and reduced exactly once (closest target, min distance, target count);
+    every consumer reads the cached values until the next frame replaces
+    them. The reduction is integer mm throughout; floats are only made on
+    demand for display (get_distance, get_closest_target, get_report).
+    If frames stop arriving (link lost, sensor in config mode), the cache
+    is cleared after max_age_ms and an empty frame is published every
+    frame_ms after that, so trackers keep counting misses.
+    """
+    NO_TARGET = 65535  # distance reported when nothing is seen (matches ultrasonic timeout)
+
+    def __init__(self, radar, max_age_ms=300, frame_ms=100):
+        self.radar = radar
+        # latest frame, raw units; a group's is one 12-value block per sensor
+        self.frame = array('h', [0] * getattr(radar, 'fields', REPORT_FIELDS))
+        self.max_age_us = max_age_ms * 1000
+        self.frame_us = frame_ms * 1000
+        self.seq = 0           # sequence number of the cached frame (0 = none yet)
+        self.ticks = 0         # its arrival ticks_us (of the empty frame once stale)
+        self.version = 0       # bumped on every cache change, new frame or expiry
+        self.stale = False     # frames stopped; the cache holds an empty frame
+        self._expires = 0      # ticks_us when the cache goes stale
+        self.closest = -1      # field offset of the closest target in frame, -1 = none
+        self.min_dist_sq = -1  # mm^2 to the closest target, -1 = none
+        self.target_count = 0
+        self._dist = None      # cm, built on demand
+        self._report = None    # float tuple for display, built on demand
+
+    def update(self):
+        """
+        Pulls the freshest frame if a new one arrived, or expires the cache
+        if none came for too long. Returns True if the cache changed.
+        """
+        radar = self.radar
+        if not radar.read_report_into(self.frame, latest=True):
+            if self.seq and time.ticks_diff(time.ticks_us(), self._expires) >= 0:
+                self._expire()
+                return True
+            return False
+        self.seq = radar.last_report_seq
+        self.ticks = radar.last_report_ticks
+        self._expires = time.ticks_add(self.ticks, self.max_age_us)
+        self.stale = False
+        self._reduce()
+        return True
+
+    def _expire(self):
+        """Replaces the cache with an empty frame and schedules the next one."""
+        now = time.ticks_us()
+        self.ticks = now
+        self._expires = time.ticks_add(now, self.frame_us)
+        self.stale = True
+        f = self.frame
+        for i in range(len(f)):
+            f[i] = 0
+        self._reduce()
+
+    def _reduce(self):
+        """Finds the closest target and the target count of the cached frame."""
+        self.version += 1
+        self._dist = None
+        self._report = None
+
+        f = self.frame
+        best = -1
+        best_sq = 0
+        count = 0
+        for i in range(0, len(f), 4):
+            if f[i + 3] > 0 and (f[i] != 0 or f[i + 1] != 0):  # valid target
+                count += 1
+                d_sq = f[i] * f[i] + f[i + 1] * f[i + 1]      # mm^2
+                if best < 0 or d_sq < best_sq:
+                    best = i
+                    best_sq = d_sq
+        self.target_count = count
+        self.closest = best
+        self.min_dist_sq = best_sq if best >= 0 else -1
+
+    def within(self, dist_cm):
+        """True if the closest target is nearer than dist_cm. Squared integer compare, no update."""
+        lim = dist_cm * 10
+        return 0 <= self.min_dist_sq < lim * lim
+
+    def get_distance(self):
+        """Distance in cm to the closest target, or NO_TARGET."""
+        self.update()
+        if self.closest < 0:
+            return self.NO_TARGET
+        if self._dist is None:
+            self._dist = math.sqrt(self.min_dist_sq) / 10.0
+        return self._dist
+
+    def get_closest_target(self):
+        """((x, y, speed, res), dist) of the closest target in cm, or (None, NO_TARGET)."""
+        self.update()
+        i = self.closest
+        if i < 0:
+            return None, self.NO_TARGET
+        f = self.frame
+        return (f[i] / 10.0, f[i + 1] / 10.0, f[i + 2], f[i + 3] / 10.0), self.get_distance()
+
+    def get_report(self):
+        """
+        The cached frame as parse_radar_report returns it (x, y, speed, res
+        per target, cm and cm/s), or None. A group's has 12 values per sensor.
+        """
+        self.update()
+        if not self.seq or self.stale:
+            return None
+        if self._report is None:
+            t = self.frame
+            self._report = tuple(t[i] if i & 3 == 2 else t[i] / 10.0 for i in range(len(t)))
+        return self._report
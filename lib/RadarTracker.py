@@ -0,0 +1,172 @@
+import time
+from array import array
+
+
+class RadarTracker:
+    """
+    Multi-frame tracker on top of a RadarService. Associates the three target
+    slots across frames into persistent tracks with IDs, smoothing each
+    with an alpha-beta filter (position and velocity, mm and mm/s).
+    All state is integer (gains in 1/256ths), so a frame costs no heap.
+    Obstacle queries are answered from values kept up to date by update().
+    """
+    def __init__(self, radar, max_tracks=6, alpha=0.6, beta=0.2, gate=40.0,
+                 confirm_hits=2, max_misses=3, min_range=0.0):
+        self.radar = radar  # RadarService
+        self.alpha = int(alpha * 256)         # Q8 gains
+        self.beta = int(beta * 256)
+        self.gate_sq = int(gate * 10) ** 2    # mm^2 - max jump to stay the same track
+        self.confirm_hits = confirm_hits      # hits before a track counts as real
+        self.max_misses = max_misses          # missed frames before a track is dropped
+        self.min_range_sq = int(min_range * 10) ** 2  # mm^2 - closer detections are ghosts
+
+        n = max_tracks
+        self.active = bytearray(n)
+        self.track_id = array('H', [0] * n)
+        self.x = array('i', [0] * n)         # mm
+        self.y = array('i', [0] * n)
+        self.vx = array('i', [0] * n)        # mm/s
+        self.vy = array('i', [0] * n)
+        self.speed = array('h', [0] * n)     # last radial speed from the sensor, cm/s, + = moving away
+        self.hits = array('H', [0] * n)      # frames the track was seen
+        self.misses = bytearray(n)           # consecutive frames it was not
+        self.age = array('H', [0] * n)       # frames since the track was born
+        self._next_id = 1
+
+        self._used = bytearray(n)
+        self._version = 0
+        self._last_ticks = 0
+        self.nearest_sq = -1              # mm^2 to the nearest confirmed track, -1 = none
+        self.nearest_any_sq = -1          # same, including unconfirmed tracks
+        self.nearest = -1                 # index of nearest confirmed track
+        self.nearest_any = -1             # index of nearest track, confirmed or not
+
+    def reset(self):
+        for i in range(len(self.active)):
+            self.active[i] = 0
+        self.nearest_sq = -1
+        self.nearest_any_sq = -1
+        self.nearest = -1
+        self.nearest_any = -1
+
+    def update(self):
+        """
+        Feeds the service's newest frame through the tracker if not seen
+        yet (an expired service's empty frames count as misses). Returns
+        True if so.
+        """
+        radar = self.radar
+        radar.update()
+        if radar.version == self._version:
+            return False
+        self._version = radar.version
+        ticks = radar.ticks
+        dt_ms = time.ticks_diff(ticks, self._last_ticks) // 1000 if self._last_ticks else 100
+        self._last_ticks = ticks
+        self.update_frame(radar.frame, max(10, min(500, dt_ms)))
+        return True
+
+    def update_frame(self, frame, dt_ms):
+        """
+        Runs one tracker step on a decoded frame (raw units, any number of
+        4-value target blocks) dt_ms milliseconds after the last.
+        """
+        n = len(self.active)
+        used = self._used
+        for i in range(n):
+            used[i] = 0
+            if self.active[i]:
+                # Predict
+                self.x[i] += self.vx[i] * dt_ms // 1000
+                self.y[i] += self.vy[i] * dt_ms // 1000
+
+        for s in range(0, len(frame), 4):
+            if frame[s + 3] <= 0 or (frame[s] == 0 and frame[s + 1] == 0):
+                continue  # empty slot
+            zx = frame[s]
+            zy = frame[s + 1]
+            if zx * zx + zy * zy < self.min_range_sq:
+                continue
+            # Associate with the nearest free predicted track inside the gate
+            best = -1
+            best_d2 = self.gate_sq
+            for i in range(n):
+                if self.active[i] and not used[i]:
+                    dx = zx - self.x[i]
+                    dy = zy - self.y[i]
+                    d2 = dx * dx + dy * dy
+                    if d2 <= best_d2:
+                        best = i
+                        best_d2 = d2
+            if best >= 0:
+                i = best
+                rx = zx - self.x[i]
+                ry = zy - self.y[i]
+                self.x[i] += self.alpha * rx >> 8
+                self.y[i] += self.alpha * ry >> 8
+                self.vx[i] += self.beta * rx * 1000 // (dt_ms << 8)
+                self.vy[i] += self.beta * ry * 1000 // (dt_ms << 8)
+                self.speed[i] = frame[s + 2]
+                if self.hits[i] < 65535:
+                    self.hits[i] += 1
+                self.misses[i] = 0
+                used[i] = 1
+            else:
+                self._birth(zx, zy, frame[s + 2])
+
+        # Age, drop stale tracks and refresh the nearest-obstacle cache
+        self.nearest_sq = -1
+        self.nearest_any_sq = -1
+        self.nearest = -1
+        self.nearest_any = -1
+        for i in range(n):
+            if not self.active[i]:
+                continue
+            if not used[i]:
+                self.misses[i] += 1
+                if self.misses[i] > self.max_misses:
+                    self.active[i] = 0
+                    continue
+            if self.age[i] < 65535:
+                self.age[i] += 1
+            d2 = self.x[i] * self.x[i] + self.y[i] * self.y[i]
+            if self.nearest_any_sq < 0 or d2 < self.nearest_any_sq:
+                self.nearest_any_sq = d2
+                self.nearest_any = i
+            if self.hits[i] >= self.confirm_hits and (self.nearest_sq < 0 or d2 < self.nearest_sq):
+                self.nearest_sq = d2
+                self.nearest = i
+
+    def _birth(self, zx, zy, speed):
+        for i in range(len(self.active)):
+            if not self.active[i]:
+                self.active[i] = 1
+                self.track_id[i] = self._next_id
+                self._next_id = self._next_id % 65535 + 1
+                self.x[i] = zx
+                self.y[i] = zy
+                self.vx[i] = 0
+                self.vy[i] = 0
+                self.speed[i] = speed
+                self.hits[i] = 1
+                self.misses[i] = 0
+                self.age[i] = 0
+                self._used[i] = 1
+                return i
+        return -1  # no free slot; detection ignored
+
+    def confidence(self, i):
+        """0..1 - how established track i is."""
+        return min(1.0, self.hits[i] / (2.0 * self.confirm_hits)) / (1 + self.misses[i])
+
+    def obstacle_within(self, dist_cm, confirmed=True):
+        """True if a (confirmed) track is closer than dist_cm. O(1), compares squares."""
+        d2 = self.nearest_sq if confirmed else self.nearest_any_sq
+        lim = dist_cm * 10
+        return 0 <= d2 < lim * lim
+
+    def get_tracks(self):
+        """List of (id, x, y, vx, vy, confidence, age) in cm and cm/s for the active tracks (for display/logging)."""
+        return [(self.track_id[i], self.x[i] / 10, self.y[i] / 10, self.vx[i] / 10, self.vy[i] / 10,
+                 self.confidence(i), self.age[i])
+                for i in range(len(self.active)) if self.active[i]]
@@ -0,0 +1,99 @@
+import time
+import asyncio
+
+
+class PeriodicTask:
+    """One function run every period_ms by TaskRuntime, with its timing stats."""
+    def __init__(self, name, func, period_ms):
+        self.name = name
+        self.func = func
+        self.period_ms = period_ms
+        self.enabled = True
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.runs = 0
+        self.overruns = 0        # periods missed because a run (or another task) took too long
+        self.late_max_ms = 0     # worst start delay against the schedule (jitter)
+        self.late_total_ms = 0
+        self.exec_max_us = 0     # longest single run
+
+    def jitter_ms(self):
+        """Mean start delay against the schedule, ms."""
+        return self.late_total_ms / self.runs if self.runs else 0
+
+
+class TaskRuntime:
+    """
+    Cooperative scheduler on asyncio. Each task is a plain function called
+    at its own period; tasks share state through the values they leave
+    behind, not by calling each other. A slow task delays the others only
+    for the length of one of its runs, and the delay is measured as jitter.
+    """
+    def __init__(self):
+        self.tasks = []
+        self.running = False
+
+    def add(self, name, func, period_ms):
+        task = PeriodicTask(name, func, period_ms)
+        self.tasks.append(task)
+        return task
+
+    def get(self, name):
+        for task in self.tasks:
+            if task.name == name:
+                return task
+        return None
+
+    def set_period(self, name, period_ms):
+        self.get(name).period_ms = period_ms
+
+    async def _loop(self, task):
+        due = time.ticks_ms()
+        while self.running:
+            now = time.ticks_ms()
+            late = time.ticks_diff(now, due)
+            if task.enabled:
+                start = time.ticks_us()
+                task.func()
+                spent = time.ticks_diff(time.ticks_us(), start)
+                task.runs += 1
+                task.late_total_ms += late
+                if late > task.late_max_ms:
+                    task.late_max_ms = late
+                if spent > task.exec_max_us:
+                    task.exec_max_us = spent
+            due = time.ticks_add(due, task.period_ms)
+            wait = time.ticks_diff(due, time.ticks_ms())
+            if wait < 0:
+                # Fell a whole period behind: skip ahead instead of bursting
+                task.overruns += 1
+                due = time.ticks_ms()
+                wait = 0
+            await asyncio.sleep(wait / 1000)
+
+    async def _main(self):
+        self.running = True
+        await asyncio.gather(*[self._loop(task) for task in self.tasks])
+
+    def run(self):
+        """Runs every task until stop() is called. Blocks."""
+        asyncio.run(self._main())
+
+    def stop(self):
+        self.running = False
+
+    def reset_stats(self):
+        for task in self.tasks:
+            task.reset_stats()
+
+    def get_stats(self):
+        """{name: (runs, mean_late_ms, max_late_ms, overruns, max_exec_us)}"""
+        return {task.name: (task.runs, task.jitter_ms(), task.late_max_ms,
+                            task.overruns, task.exec_max_us)
+                for task in self.tasks}
+
+    def log_stats(self, log):
+        """Writes one jitter line per task through log (e.g. add_log)."""
+        for task in self.tasks:
+            log(f"{task.name[:5]} {task.period_ms}ms j{task.late_max_ms}")
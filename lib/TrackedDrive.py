@@ -0,0 +1,75 @@
+import math
+from PIDController import PIDController
+
+
+class TrackedDrive:
+    """
+    Straight-line and arc tracking for a differential drive. The commanded
+    left/right efforts fix the wheel ratio, and so the path. Each update()
+    reads both encoders and the IMU yaw and steers back onto that path.
+    Progress is measured along the faster wheel, in encoder revolutions like
+    motor.get_position(), so a drive ends on the distance it was asked for
+    even if one wheel stands still.
+    """
+    def __init__(self, drivetrain, imu=None, kp=0.03, ki=0.0, kd=0.002,
+                 imu_weight=0.7, max_correction=0.3, wheel_diam_cm=None, track_cm=None):
+        self.drivetrain = drivetrain
+        self.imu = imu
+        self.imu_weight = imu_weight  # share of the heading error taken from the gyro vs the encoders
+        self.pid = PIDController(kp, ki, kd, out_min=-max_correction, out_max=max_correction)
+        wheel_diam_cm = wheel_diam_cm or getattr(drivetrain, 'wheel_diam', 6.0)
+        track_cm = track_cm or getattr(drivetrain, 'track_width', 15.5)
+        self.deg_per_rev = math.degrees(math.pi * wheel_diam_cm / track_cm)  # heading per rev of wheel difference
+        self.progress = 0.0       # revolutions along the path, on the faster wheel
+        self.heading_error = 0.0  # deg, + = turned too far counter-clockwise
+        self.correction = 0.0
+        self.start(0, 0, 0)
+
+    def _positions(self):
+        return (self.drivetrain.left_motor.get_position(),
+                self.drivetrain.right_motor.get_position())
+
+    def start(self, left_eff, right_eff, target_revs):
+        """Begins a drive at these efforts until the faster wheel has turned target_revs."""
+        self.left_eff = left_eff
+        self.right_eff = right_eff
+        top = max(abs(left_eff), abs(right_eff)) or 1
+        self._kl = left_eff / top   # unit wheel ratio; the faster wheel is +-1
+        self._kr = right_eff / top
+        self._norm = self._kl * self._kl + self._kr * self._kr or 1
+        self.target = abs(target_revs)
+        self._l0, self._r0 = self._positions()
+        self._yaw0 = self.imu.get_yaw() if self.imu else 0.0
+        self.progress = 0.0
+        self.heading_error = 0.0
+        self.correction = 0.0
+        self.pid.reset()
+
+    def update(self, scale=1.0, dt=0.01):
+        """
+        Sets corrected efforts (scaled by scale, e.g. from CollisionGuard).
+        Returns False once the target distance is reached.
+        """
+        l, r = self._positions()
+        dl = l - self._l0
+        dr = r - self._r0
+        kl = self._kl
+        kr = self._kr
+        # Distance along the commanded path (projection onto the wheel ratio)
+        self.progress = (dl * kl + dr * kr) / self._norm
+        if self.progress >= self.target:
+            return False
+
+        want = self.progress * (kr - kl) * self.deg_per_rev   # heading change the arc should have by now
+        enc_error = (dr - dl) * self.deg_per_rev - want
+        if self.imu:
+            yaw_error = (self.imu.get_yaw() - self._yaw0) - want
+            w = self.imu_weight
+            self.heading_error = w * yaw_error + (1 - w) * enc_error
+        else:
+            self.heading_error = enc_error
+        # Too far counter-clockwise: speed the left wheel up, the right down
+        self.correction = self.pid.update(self.heading_error, dt)
+        c = self.correction
+        self.drivetrain.set_effort((self.left_eff + c) * scale, (self.right_eff - c) * scale)
+        return True
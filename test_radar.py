@@ -1,42 +1,261 @@
+import math
+import os
+import struct
+import tempfile
+import time
 import unittest
+from array import array
 from unittest.mock import MagicMock, patch
-from XRPRadar import XRPRadar
+import ld2450_sim  # host shims for machine/micropython; must come before XRPRadar
+from ld2450_sim import LD2450Emulator, FakeUART, encode_report, encode_ack, line, still
+from XRPRadar import XRPRadar, REPORT_FIELDS, corridor_zone
+from RadarService import RadarService
+from RadarGroup import RadarGroup
+from RadarCapture import RadarReplay, MAGIC
+from RadarTracker import RadarTracker
+from OccupancyGrid import OccupancyGrid
+from CollisionGuard import CollisionGuard
+from TaskRuntime import TaskRuntime
+from ControlTick import ControlTick
+from PIDController import PIDController
+from TrackedDrive import TrackedDrive
+from MotionProfile import TrapezoidProfile
+from PoseEstimator import PoseEstimator
+from ObstacleAvoider import ObstacleAvoider
+from RadarFollower import RadarFollower
+
 
 class TestXRPRadar(unittest.TestCase):
     def setUp(self):
-        """Set up a mock XRPRadar instance."""
-        self.radar = XRPRadar.__new__(XRPRadar)  # Create without __init__ to avoid UART
-        self.radar.buffer = b""
-        self.radar.REPORT_HEADER = b'\xaa\xff\x03\x00'
-        self.radar.REPORT_TAIL = b'\x55\xcc'
+        """Set up an XRPRadar instance fed from the simulated sensor."""
+        self.emu = LD2450Emulator()
+        self.uart = FakeUART(self.emu)
+        self.radar = XRPRadar(0, 0, 1, buffer_size=256, uart=self.uart)
 
     def test_parse_radar_report_no_data(self):
         """Test parsing with no data."""
-        self.radar.buffer = b""
-        with patch.object(self.radar, 'ser') as mock_ser:
-            mock_ser.any.return_value = 0
-            result = self.radar.parse_radar_report()
-            self.assertIsNone(result)
+        result = self.radar.parse_radar_report()
+        self.assertIsNone(result)
 
     def test_parse_radar_report_valid_frame(self):
         """Test parsing a valid radar frame."""
-        # Mock frame: header + 3 targets + tail
-        # Target 1: x=100 (0x0A00), y=-50 (0x3200), speed=20 (0x1400), res=80 (0x5000)
-        # Scaled: x=10.0, y=-5.0, speed=2.0, res=8.0
-        frame = (
-            b'\xaa\xff\x03\x00'  # header
-            b'\x00\x0a'  # x: 0x0A00 = 2560, sign=1, mag=2560, /10=256.0 wait, mistake
-            # Let's use correct values
-        )
-        # Better to use real bytes
-        frame = b'\xaa\xff\x03\x00\x00\x0a\x00\x32\x00\x14\x00\x50\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x55\xcc'
-        self.radar.buffer = frame
-        with patch.object(self.radar, 'ser') as mock_ser:
-            mock_ser.any.return_value = 0
+        # Target 1: x=100mm, y=-50mm, speed=2cm/s, res=80mm (sign-magnitude words)
+        # Scaled: x=10.0, y=-5.0, speed=2, res=8.0
+        frame = encode_report([(100, -50, 2, 80)])
+        self.assertEqual(frame[4:12], b'\x64\x80\x32\x00\x02\x80\x50\x00')
+        self.emu.out += frame
+        result = self.radar.parse_radar_report()
+        # Check if parsed correctly
+        expected = (10.0, -5.0, 2.0, 8.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)  # 3 targets
+        self.assertEqual(result, expected)
+
+    def test_parse_radar_report_wraps_ring(self):
+        """Frames that straddle the end of the ring buffer decode correctly."""
+        frame = (b'\xaa\xff\x03\x00' + b'\x64\x80\xc8\x00\x0a\x80\x50\x00'
+                 + bytes(16) + b'\x55\xcc')
+        for _ in range(20):  # 600 bytes through a 256-byte ring
+            self.emu.out += frame
             result = self.radar.parse_radar_report()
-            # Check if parsed correctly
-            expected = (10.0, -5.0, 2.0, 8.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)  # 3 targets
-            self.assertEqual(result, expected)
+            self.assertEqual(result[:4], (10.0, -20.0, 10, 8.0))
+        self.assertIsNone(self.radar.parse_radar_report())
+
+    def test_parse_radar_report_resyncs_after_garbage(self):
+        """Leading garbage and a truncated header are skipped."""
+        frame = (b'\xaa\xff\x03\x00' + b'\x64\x80\xc8\x80\x00\x00\x50\x00'
+                 + bytes(16) + b'\x55\xcc')
+        self.emu.out += b'\x01\x02\xaa\xff\x03\x00\x09' + frame
+        result = self.radar.parse_radar_report()
+        self.assertEqual(result[:4], (10.0, 20.0, 0, 8.0))
+
+    def test_ack_and_reports_are_demultiplexed(self):
+        """An ACK between two reports is queued without losing either report."""
+        frame = (b'\xaa\xff\x03\x00' + b'\x64\x80\xc8\x80\x00\x00\x50\x00'
+                 + bytes(16) + b'\x55\xcc')
+        ack = b'\xfd\xfc\xfb\xfa\x04\x00\x90\x01\x00\x00\x04\x03\x02\x01'
+        self.emu.out += frame + ack + frame
+        response = self.radar.poll_for_response()
+        self.assertEqual(response, ack)
+        self.assertTrue(self.radar.get_command_success(response))
+        self.assertIsNotNone(self.radar.parse_radar_report())
+        self.assertIsNotNone(self.radar.parse_radar_report())
+        self.assertIsNone(self.radar.parse_radar_report())
+        self.assertIsNone(self.radar.poll_for_response())
+
+    def test_partial_frame_waits_for_more_bytes(self):
+        """A report split across reads is parsed once the tail arrives."""
+        frame = (b'\xaa\xff\x03\x00' + b'\x64\x80\xc8\x80\x00\x00\x50\x00'
+                 + bytes(16) + b'\x55\xcc')
+        self.emu.out += frame[:17]
+        self.assertIsNone(self.radar.parse_radar_report())
+        self.emu.out += frame[17:]
+        self.assertIsNotNone(self.radar.parse_radar_report())
+
+    def test_read_reports_into_batch(self):
+        """Queued frames decode into one preallocated array, raw units."""
+        frame = (b'\xaa\xff\x03\x00' + b'\x64\x80\xc8\x00\x0a\x80\x50\x00'
+                 + b'\x00\x00\x00\x00\x00\x00\x00\x00'
+                 + b'\x0c\x00\x34\x81\x05\x00\x64\x00' + b'\x55\xcc')
+        self.emu.out += frame * 3
+        out = array('h', [0] * (4 * REPORT_FIELDS))
+        self.assertEqual(self.radar.read_reports_into(out), 3)
+        self.assertEqual(list(out[:REPORT_FIELDS]),
+                         [100, -200, 10, 80, 0, 0, 0, 0, -12, 308, -5, 100])
+        self.assertEqual(out[2 * REPORT_FIELDS + 9], 308)
+        self.assertEqual(self.radar.read_reports_into(out), 0)
+
+    def test_latest_mode_skips_backlog(self):
+        """latest=True decodes the newest frame and counts the rest as skipped."""
+        old = (b'\xaa\xff\x03\x00' + b'\x64\x80\xc8\x80\x00\x00\x50\x00'
+               + bytes(16) + b'\x55\xcc')
+        new = (b'\xaa\xff\x03\x00' + b'\x2c\x81\xc8\x80\x00\x00\x50\x00'
+               + bytes(16) + b'\x55\xcc')
+        self.emu.out += old + old + new
+        result = self.radar.parse_radar_report(latest=True)
+        self.assertEqual(result[:2], (30.0, 20.0))
+        self.assertEqual(self.radar.frames_skipped, 2)
+        self.assertIsNone(self.radar.parse_radar_report())
+
+    def test_sequence_and_counters(self):
+        """Reports carry sequence numbers; resyncs and discarded bytes are counted."""
+        frame = (b'\xaa\xff\x03\x00' + b'\x64\x80\xc8\x80\x00\x00\x50\x00'
+                 + bytes(16) + b'\x55\xcc')
+        self.emu.out += frame + b'\x00\x11\x22' + frame
+        self.radar.parse_radar_report()
+        self.assertEqual(self.radar.last_report_seq, 1)
+        self.radar.parse_radar_report()
+        self.assertEqual(self.radar.last_report_seq, 2)
+        stats = self.radar.get_stats()
+        self.assertEqual(stats["frames_ok"], 2)
+        self.assertEqual(stats["frames_resynced"], 1)
+        self.assertEqual(stats["bytes_discarded"], 3)
+        self.assertEqual(stats["buffer_overflows"], 0)
+
+    def test_frame_rate_falls_to_zero_when_frames_stop(self):
+        """get_stats() closes the rate window itself, and reset_stats() restarts it."""
+        clock = [0]
+        with patch.object(time, 'ticks_us', lambda: clock[0]):
+            radar = XRPRadar(0, 0, 1, uart=FakeUART(self.emu))
+            for _ in range(21):  # 10 Hz for two seconds
+                self.emu.advance(0.1)
+                clock[0] += 100000
+                radar.parse_radar_report()
+            self.assertAlmostEqual(radar.get_stats()["frame_rate"], 10.0, delta=0.5)
+            clock[0] += 1500000  # sensor goes silent
+            self.assertLess(radar.get_stats()["frame_rate"], 1.0)
+            clock[0] += 1000000
+            self.assertEqual(radar.get_stats()["frame_rate"], 0.0)
+            self.emu.advance(0.1)
+            clock[0] += 100000
+            radar.parse_radar_report()
+            radar.reset_stats()
+            self.assertEqual(radar.frame_rate, 0.0)
+            self.assertEqual(radar._rate_frames, 0)
+            self.assertEqual(radar._rate_start, clock[0])
+
+    def test_multi_target_transaction_matches_acks(self):
+        """A mode switch completes step by step as the sensor ACKs each command."""
+        self.emu.out += encode_ack(0x0090)  # stray ACK left over from earlier
+        seq = self.radar.set_multi_target(False)
+        for _ in range(10):
+            if seq.poll():
+                break
+        self.assertTrue(seq.success)
+        self.assertEqual(self.radar.acks_unmatched, 1)
+        self.assertFalse(self.emu.multi_target)
+        self.assertFalse(self.emu.config_mode)
+
+    def test_zone_filter_round_trip(self):
+        """A corridor zone is programmed, read back, and filters reports."""
+        self.emu.targets = [still(0, 15), still(60, 15)]
+        self.assertTrue(self.radar.set_zone_filter(XRPRadar.ZONE_DETECT, [(-15, 10, 15, 20)]).wait())
+        query = self.radar.query_zone_filter()
+        self.assertTrue(query.wait())
+        self.assertEqual(self.radar.zone_filter_from(query), (1, [(-15.0, 10.0, 15.0, 20.0)]))
+        self.emu.advance(0.1)
+        self.assertEqual(self.radar.parse_radar_report()[:2], (0.0, 15.0))
+        self.assertEqual(self.radar.parse_radar_report()[4:8], (0.0, 0.0, 0, 0.0))
+
+    def test_simulated_stream_with_split_reads_and_corruption(self):
+        """Every intact frame of a noisy, chopped-up stream is decoded."""
+        emu = LD2450Emulator(targets=[line((0, 200), (0, 50), 2.0)], rate_hz=20,
+                             corrupt_prob=0.2, seed=3)
+        radar = XRPRadar(0, 0, 1, uart=FakeUART(emu, split_reads=True, seed=4), report_queue=8)
+        ys = []
+        for _ in range(60):
+            emu.advance(0.05)
+            report = radar.parse_radar_report()
+            while report is not None:
+                ys.append(report[1])
+                report = radar.parse_radar_report()
+        self.assertGreater(len(ys), 40)
+        self.assertEqual(radar.frames_dropped, 0)
+        self.assertEqual(ys, sorted(ys, reverse=True))  # walking toward the sensor
+        self.assertGreater(radar.frames_resynced, 0)
+
+    def test_negotiate_baud_upgrades_link(self):
+        """Startup negotiation moves the simulated sensor to 460800."""
+        emu = LD2450Emulator(targets=[still(0, 100)], rate_hz=100)
+        radar = XRPRadar(0, 0, 1, uart=FakeUART(emu, realtime=True))
+        self.assertEqual(radar.negotiate_baud(verify_ms=200, boot_ms=600), 460800)
+        self.assertEqual(emu.baudrate, 460800)
+
+    def _virtual_clock(self, emu):
+        """Patches the time helpers so sleeps run the emulator instead of the wall clock."""
+        clock = [0.0]
+        def sleep_ms(ms):
+            clock[0] += ms / 1000
+            emu.advance(ms / 1000)
+        return patch.multiple(time, ticks_ms=lambda: int(clock[0] * 1000),
+                              ticks_us=lambda: int(clock[0] * 1000000), sleep_ms=sleep_ms)
+
+    def test_probe_finds_sensor_at_any_frame_phase(self):
+        """A 10 Hz sensor left at 460800 by an earlier boot is found whatever its frame phase."""
+        for phase_ms in range(0, 100, 10):
+            emu = LD2450Emulator(targets=[still(0, 100)], baudrate=460800)
+            emu._next_frame = phase_ms / 1000
+            radar = XRPRadar(0, 0, 1, uart=FakeUART(emu))
+            with self._virtual_clock(emu):
+                self.assertEqual(radar.negotiate_baud(), 460800)
+            self.assertEqual(emu.baudrate, 460800)
+
+    def test_negotiate_baud_reports_silent_sensor(self):
+        """Nothing heard at any rate is reported, not assumed to be 256000."""
+        emu = LD2450Emulator()
+        emu.config_mode = True  # sensor stuck in config mode sends no reports
+        radar = XRPRadar(0, 0, 1, uart=FakeUART(emu))
+        with self._virtual_clock(emu):
+            self.assertIsNone(radar.negotiate_baud())
+        self.assertEqual(radar.baudrate, 256000)
+
+    def test_work_budget_bounds_each_call(self):
+        """A byte budget spreads a garbage backlog over several calls."""
+        self.radar.set_work_budget(max_bytes=64)
+        self.emu.out += bytes(150) + encode_report([(100, 200, 0, 80)])
+        calls = 0
+        report = None
+        while report is None and calls < 10:
+            report = self.radar.parse_radar_report()
+            calls += 1
+            if report is None:
+                self.assertTrue(self.radar.work_pending)
+        self.assertEqual(report[:2], (10.0, 20.0))
+        self.assertEqual(calls, 3)
+        self.assertFalse(self.radar.work_pending)
+
+    def test_background_ingest_snapshot(self):
+        """In background mode the IRQ path parses and readers do no I/O."""
+        frame = (b'\xaa\xff\x03\x00' + b'\x64\x80\xc8\x80\x00\x00\x50\x00'
+                 + bytes(16) + b'\x55\xcc')
+        self.radar.start_background(trigger=1)
+        self.emu.out += frame
+        out = array('h', [0] * REPORT_FIELDS)
+        self.assertEqual(self.radar.get_latest_report(out), 0)  # no IRQ yet
+        with patch('micropython.schedule', lambda f, arg: f(arg)):
+            self.uart.handler(self.uart)
+        self.assertEqual(self.radar.get_latest_report(out), 1)
+        self.assertEqual(list(out[:4]), [100, 200, 0, 80])
+        self.assertIsNotNone(self.radar.parse_radar_report())
+        self.radar.stop_background()
 
     def test_signed_mag_positive(self):
         """Test signed magnitude conversion for positive values."""
@@ -44,5 +263,520 @@ class TestXRPRadar(unittest.TestCase):
         # For now, skip detailed tests as hardware dependent
         pass
 
+
+class TestRadarCapture(unittest.TestCase):
+    def test_capture_replays_the_same_frames(self):
+        """A captured simulated stream replays, at full speed, into the same decoded frames."""
+        emu = LD2450Emulator(targets=[line((-50, 200), (30, 40), 2.0), still(80, 120)], rate_hz=20)
+        radar = XRPRadar(0, 0, 1, buffer_size=256, uart=FakeUART(emu))
+        out = array('h', [0] * REPORT_FIELDS)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'radar.cap')
+            self.assertEqual(radar.stop_capture(), (0, 0))  # nothing recording yet
+            radar.start_capture(path)
+            live = []
+            for _ in range(40):
+                emu.advance(0.05)
+                while radar.read_report_into(out):
+                    live.append(list(out))
+            records, nbytes = radar.stop_capture()
+            self.assertEqual(len(live), emu.frames_sent)
+            self.assertEqual(nbytes, emu.frames_sent * XRPRadar.REPORT_FRAME_LEN)
+
+            # The file holds exactly those records and bytes
+            with open(path, 'rb') as f:
+                data = f.read()
+            self.assertEqual(data[:len(MAGIC)], MAGIC)
+            pos, count, total = len(MAGIC), 0, 0
+            while pos < len(data):
+                _, length = struct.unpack_from('<HH', data, pos)
+                pos += 4 + length
+                count += 1
+                total += length
+            self.assertEqual((pos, count, total), (len(data), records, nbytes))
+
+            replay = RadarReplay(path, realtime=False)
+            radar = XRPRadar(0, 0, 1, buffer_size=256, uart=replay)
+            replayed = []
+            while True:
+                if radar.read_report_into(out):
+                    replayed.append(list(out))
+                elif replay.finished:
+                    break  # the replay closes the file at its end
+        self.assertGreater(len(live), 30)
+        self.assertEqual(replayed, live)
+        self.assertEqual(radar.frames_resynced, 0)
+
+
+class TestRadarService(unittest.TestCase):
+    def setUp(self):
+        """A service over a radar fed from the simulated sensor."""
+        self.emu = LD2450Emulator()
+        self.radar = XRPRadar(0, 0, 1, buffer_size=256, uart=FakeUART(self.emu))
+
+    def test_radar_service_reduces_frame_once(self):
+        """Every RadarService query answers from the one cached frame."""
+        service = RadarService(self.radar)
+        self.assertEqual(service.get_distance(), RadarService.NO_TARGET)
+        self.emu.out += encode_report([(300, 400, 5, 80), (60, 80, -3, 80)])
+        self.assertEqual(service.get_distance(), 10.0)
+        target, dist = service.get_closest_target()
+        self.assertEqual(target, (6.0, 8.0, -3, 8.0))
+        self.assertEqual(service.target_count, 2)
+        self.assertEqual(service.get_report()[:4], (30.0, 40.0, 5, 8.0))
+        self.assertEqual(service.seq, 1)  # nothing re-read in between
+        self.assertEqual(service.min_dist_sq, 10000)  # integer mm^2
+        self.assertTrue(service.within(11))
+        self.assertFalse(service.within(10))
+
+    def test_cached_frame_expires_when_frames_stop(self):
+        """Without new frames the cache clears after max_age_ms and the tracker counts misses."""
+        clock = [0]
+        with patch.object(time, 'ticks_us', lambda: clock[0]):
+            service = RadarService(self.radar)
+            tracker = RadarTracker(service)
+            self.emu.out += encode_report([(0, 500, 0, 80)])
+            self.assertTrue(tracker.update())
+            clock[0] = 250000
+            self.assertFalse(service.update())  # 250 ms old: still fresh
+            self.assertEqual(service.get_distance(), 50.0)
+            clock[0] = 300000
+            self.assertTrue(service.update())
+            self.assertTrue(service.stale)
+            self.assertEqual(service.get_distance(), RadarService.NO_TARGET)
+            self.assertIsNone(service.get_report())
+            self.assertFalse(service.within(1000))
+            self.assertTrue(tracker.update())  # the empty frame is a miss
+            self.assertFalse(tracker.update())
+            for _ in range(3):  # one more empty frame per frame period
+                clock[0] += 100000
+                self.assertTrue(tracker.update())
+            self.assertEqual(tracker.get_tracks(), [])
+            self.emu.out += encode_report([(0, 500, 0, 80)])
+            self.assertTrue(service.update())
+            self.assertFalse(service.stale)
+            self.assertEqual(service.get_distance(), 50.0)
+
+
+class TestRadarGroup(unittest.TestCase):
+    def test_service_queries_fused_robot_frame(self):
+        """A front and a rear sensor fuse into one robot-frame set behind a RadarService."""
+        front = LD2450Emulator(targets=[still(10, 50)])
+        rear = LD2450Emulator(targets=[still(0, 30), still(-20, 100)])
+        group = RadarGroup()
+        group.add(XRPRadar(0, 0, 1, uart=FakeUART(front)))
+        group.add(XRPRadar(0, 0, 1, uart=FakeUART(rear)), y_cm=-16, yaw_deg=180)
+        service = RadarService(group)
+        tracker = RadarTracker(service)
+        self.assertEqual(len(service.frame), 2 * REPORT_FIELDS)
+        clock = [0]
+        with patch.object(time, 'ticks_us', lambda: clock[0]):
+            front.advance(0.05)
+            rear.advance(0.05)
+            self.assertTrue(tracker.update())
+            self.assertEqual(list(service.frame[:12]),
+                             [100, 500, 0, 320, 0, -460, 0, 320, 200, -1160, 0, 320])  # mm, robot frame
+            self.assertEqual(list(group.source[:3]), [0, 1, 1])
+            self.assertEqual(service.target_count, 3)
+            self.assertEqual(service.get_distance(), 46.0)  # the rear target is the nearest
+            self.assertEqual(tracker.nearest_any_sq, 460 * 460)
+            # The rear sensor goes quiet: its old frame ages out of the set
+            clock[0] = 200000
+            front.advance(0.2)
+            self.assertTrue(service.update())
+            self.assertEqual(group.count, 1)
+            self.assertAlmostEqual(service.get_distance(), math.hypot(10, 50), places=3)
+            self.assertFalse(service.update())  # no new frame from either sensor
+
+
+class TestRadarTracker(unittest.TestCase):
+    def test_tracker_integer_alpha_beta(self):
+        """The integer tracker follows an approaching target in mm and mm/s."""
+        tracker = RadarTracker(None)
+        frame = array('h', [0] * REPORT_FIELDS)
+        for k in range(20):
+            frame[1] = 2000 - k * 50  # 500 mm/s closing at 10 Hz
+            frame[3] = 80
+            tracker.update_frame(frame, 100)
+        self.assertIsInstance(tracker.nearest_sq, int)
+        self.assertEqual(tracker.y[0], 1050)
+        self.assertAlmostEqual(tracker.vy[0], -500, delta=10)
+        self.assertTrue(tracker.obstacle_within(110))
+        self.assertFalse(tracker.obstacle_within(100))
+
+
+class TestOccupancyGrid(unittest.TestCase):
+    def test_occupancy_grid_picks_free_side(self):
+        """Radar hits land in the grid and turn selection avoids them."""
+        grid = OccupancyGrid(decay_ms=0)
+        frame = array('h', [0] * REPORT_FIELDS)
+        # A wall ahead that extends off to the left
+        for x_mm in range(-1000, 200, 100):
+            frame[0], frame[1], frame[3] = x_mm, 400, 80
+            grid.mark_frame(frame, 0, 0, 0.0)
+        self.assertEqual(grid.value(-50, 40), OccupancyGrid.HIT)
+        turn, free = grid.freest_sector(0, 0, 0.0)
+        self.assertLess(turn, 0)  # right
+        # Seen after a half turn, the same wall is behind: any small turn is free
+        turn, free = grid.freest_sector(0, 0, math.radians(180))
+        self.assertEqual((abs(turn), free), (15.0, 150))
+        grid.decay_step = 255
+        grid.decay()
+        self.assertEqual(grid.value(-50, 40), 0)
+
+
+class TestCollisionGuard(unittest.TestCase):
+    def test_collision_guard_grades_by_closing_speed(self):
+        """The same distance is fine when static, slows when closing, stops when closing fast."""
+        drivetrain = MagicMock()
+        drivetrain.get_left_encoder_position.return_value = 0.0
+        drivetrain.get_right_encoder_position.return_value = 0.0
+        tracker = RadarTracker(None)
+        guard = CollisionGuard(drivetrain, tracker)
+        frame = array('h', [0] * REPORT_FIELDS)
+        frame[1], frame[3] = 500, 80  # 50 cm ahead
+        for speed, expected in ((0, 1.0), (-50, None), (-200, 0.0)):
+            frame[2] = speed
+            tracker.reset()
+            tracker.update_frame(frame, 100)
+            tracker.update_frame(frame, 100)
+            scale = guard.update(20)
+            if expected is None:
+                self.assertTrue(0.3 < scale < 1.0)
+                self.assertEqual(guard.ttc_ms, 1000)
+            else:
+                self.assertEqual(scale, expected)
+        frame[1] = 150  # inside the static floor
+        frame[2] = 0
+        tracker.reset()
+        tracker.update_frame(frame, 100)
+        self.assertEqual(guard.update(20, confirmed=False), 0.0)
+
+    def _approach(self, far_cm, speed_cm_s=26.4, floor_cm=20):
+        """Drives at a wall 100 cm out with a detect zone to far_cm; returns the guard's scales."""
+        emu = LD2450Emulator(targets=[line((0, 100), (0, 0), 100 / speed_cm_s)])
+        radar = XRPRadar(0, 0, 1, uart=FakeUART(emu))
+        clock = [0]
+        with patch.multiple(time, ticks_ms=lambda: clock[0], ticks_us=lambda: clock[0] * 1000):
+            self.assertTrue(radar.set_zone_filter(XRPRadar.ZONE_DETECT,
+                                                  [corridor_zone(far_cm, 30, 10)]).wait())
+            drivetrain = MagicMock()
+            wheels = [0.0]
+            drivetrain.get_left_encoder_position.side_effect = lambda: wheels[0]
+            drivetrain.get_right_encoder_position.side_effect = lambda: wheels[0]
+            tracker = RadarTracker(RadarService(radar), min_range=10)
+            guard = CollisionGuard(drivetrain, tracker)
+            scales = []
+            while not scales or scales[-1]:
+                clock[0] += 20
+                emu.advance(0.02)
+                wheels[0] = speed_cm_s * clock[0] / 1000
+                tracker.update()
+                scales.append(guard.update(floor_cm, confirmed=False))
+        return guard, scales
+
+    def test_zone_reaches_the_slowdown_band(self):
+        """A zone sized by reach_cm lets the guard slow down before the floor stops it."""
+        guard, scales = self._approach(20)  # zone ending at the floor: straight from 1 to 0
+        self.assertEqual(set(scales), {0.0, 1.0})
+        far = guard.reach_cm(26.4, 20)
+        self.assertAlmostEqual(far, 49.6)
+        guard, scales = self._approach(far)
+        graded = [v for v in scales if 0 < v < 1]
+        self.assertGreater(len(graded), 10)
+        self.assertGreater(graded[0], 0.9)   # braking starts gently
+        self.assertLess(graded[-1], 0.6)     # and is about halved at the floor
+
+
+class TestTaskRuntime(unittest.TestCase):
+    def test_task_runtime_runs_each_task_at_its_period(self):
+        """Tasks keep their own rates and the runtime records their jitter."""
+        runtime = TaskRuntime()
+        fast = runtime.add("fast", lambda: None, 10)
+        def slow_step():
+            if slow.runs == 4:
+                runtime.stop()
+        slow = runtime.add("slow", slow_step, 50)
+        runtime.run()
+        self.assertGreaterEqual(fast.runs, 3 * slow.runs)
+        runs, mean_late, max_late, overruns, exec_us = runtime.get_stats()["fast"]
+        self.assertEqual(runs, fast.runs)
+        self.assertLess(max_late, 50)
+
+
+class TestControlTick(unittest.TestCase):
+    def test_control_tick_runs_steps_and_counts_overruns(self):
+        """Timer IRQs run the step until it returns False; busy ticks are overruns."""
+        timer = MagicMock()
+        tick = ControlTick(rate_hz=100, timer=timer)
+        steps = []
+        with patch('machine.Timer', create=True):
+            tick.start(lambda: steps.append(1) or len(steps) < 3)
+        irq = timer.init.call_args.kwargs['callback']
+        for _ in range(5):
+            irq(timer)
+        self.assertEqual(len(steps), 3)
+        self.assertFalse(tick.running)
+        timer.deinit.assert_called_once()
+        self.assertTrue(tick.wait())
+        tick._scheduled = True  # a step still queued when the timer fires again
+        tick.running = True
+        irq(timer)
+        self.assertEqual(tick.get_stats()["overruns"], 1)
+        self.assertEqual(tick.get_stats()["ticks"], 3)
+
+
+    def test_wait_stops_the_timer_on_interrupt(self):
+        """Ctrl-C while waiting stops the timer before the interrupt propagates."""
+        timer = MagicMock()
+        tick = ControlTick(rate_hz=100, timer=timer)
+        with patch('machine.Timer', create=True):
+            tick.start(lambda: True)
+        def interrupt(ms):
+            raise KeyboardInterrupt
+        with patch.object(time, 'sleep_ms', interrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                tick.wait()
+        self.assertFalse(tick.running)
+        timer.deinit.assert_called_once()
+
+
+class TestPIDController(unittest.TestCase):
+    def test_pid_anti_windup_and_measured_rate(self):
+        """A saturated PID does not wind up, and a measured rate replaces the difference."""
+        pid = PIDController(0.1, ki=0.5, kd=0.0, out_min=-1.0, out_max=1.0)
+        for _ in range(100):
+            self.assertEqual(pid.update(50.0, 0.1), 1.0)  # pinned high
+        self.assertEqual(pid.integral, 0.0)
+        self.assertLess(pid.update(-5.0, 0.1), 0.0)  # reverses at once
+        pid = PIDController(0.0, kd=2.0)
+        self.assertEqual(pid.update(10.0, 0.1, d_error=-0.25), -0.5)
+
+
+class TestTrackedDrive(unittest.TestCase):
+    def test_tracked_drive_holds_line_with_weak_motor(self):
+        """A straight drive with a 15% weaker right motor still ends nearly straight."""
+        drivetrain = MagicMock(wheel_diam=6.0, track_width=15.5)
+        pos = [0.0, 0.0]
+        effort = [0.0, 0.0]
+        drivetrain.left_motor.get_position.side_effect = lambda: pos[0]
+        drivetrain.right_motor.get_position.side_effect = lambda: pos[1]
+        drivetrain.set_effort.side_effect = lambda l, r: effort.__setitem__(slice(None), [l, r])
+        drive = TrackedDrive(drivetrain)
+        drive.start(0.6, 0.6, 3.0)
+        effort[:] = [0.6, 0.6]
+        ticks = 0
+        while drive.update() and ticks < 1000:
+            pos[0] += effort[0] * 0.02
+            pos[1] += effort[1] * 0.85 * 0.02
+            ticks += 1
+        self.assertGreaterEqual(drive.progress, 3.0)
+        self.assertLess(abs(pos[0] - pos[1]), 0.05)  # uncorrected: ~0.45 revs apart
+
+
+class TestTrapezoidProfile(unittest.TestCase):
+    def test_trapezoid_profile_shapes(self):
+        """Long moves cruise at v_max, short ones peak early, and both end on the distance."""
+        p = TrapezoidProfile(10.0, 2.0, 4.0)
+        self.assertAlmostEqual(p.duration, 0.5 + 4.5 + 0.5)
+        self.assertEqual(p.at(2.0)[1], 2.0)
+        self.assertAlmostEqual(p.at(p.duration - 1e-9)[0], 10.0, places=5)
+        self.assertEqual(p.at(p.duration + 1), (10.0, 0.0))
+        short = TrapezoidProfile(0.5, 2.0, 4.0, v_start=0.5, v_end=0.5)
+        self.assertLess(short.v_peak, 2.0)
+        self.assertAlmostEqual(short.at(short.t_up)[0], 0.25)
+        self.assertAlmostEqual(short.velocity_at(0.5), 0.5)
+        self.assertAlmostEqual(short.velocity_at(0.25), short.v_peak)
+
+    def test_command_keeps_a_lagging_robot_moving(self):
+        """A robot 15% slower than calibrated still cruises and finishes about 15% late."""
+        p = TrapezoidProfile(15.0, 1.4, 6.0, 4.0, v_start=0.35, v_end=0.35)
+        s = t = 0.0
+        slowest = p.v_peak
+        while s < p.distance and t < 19.0:
+            v = p.command(t, s)
+            if s > 1.0 and p.distance - s > 1.0:
+                slowest = min(slowest, v)
+            s += 0.85 * v * 0.01
+            t += 0.01
+        self.assertEqual(slowest, p.v_peak)  # no clock-driven ramp-down mid-move
+        self.assertLess(t, p.duration / 0.85 + 0.5)
+        self.assertEqual(p.command(0.0, 0.0), p.v_start)
+        self.assertAlmostEqual(p.command(0.1, 0.0), p.v_start + 0.6)  # ramps up on the clock alone
+        self.assertAlmostEqual(p.command(10.0, 15.0), p.v_end)
+
+    def test_command_starts_from_rest(self):
+        """With the default v_start = 0 the clock ramp still gets the move going."""
+        p = TrapezoidProfile(10.0, 2.0, 4.0)
+        self.assertEqual(p.command(0.0, 0.0), 0.0)
+        self.assertAlmostEqual(p.command(0.25, 0.0), 1.0)
+        self.assertEqual(p.command(5.0, 0.0), 2.0)
+
+
+class TestPoseEstimator(unittest.TestCase):
+    def test_pose_estimator_square_and_spin(self):
+        """Spinning in place adds no forward distance; a driven square closes on itself."""
+        drivetrain = MagicMock(track_width=15.5)
+        wheels = [0.0, 0.0]
+        drivetrain.get_left_encoder_position.side_effect = lambda: wheels[0]
+        drivetrain.get_right_encoder_position.side_effect = lambda: wheels[1]
+        pose = PoseEstimator(drivetrain)
+        quarter = math.pi / 2 * 15.5 / 2  # wheel travel for a 90 degree point turn
+        for _ in range(4):
+            for _ in range(100):  # 100 cm forward
+                wheels[0] += 1.0
+                wheels[1] += 1.0
+                pose.update()
+            for _ in range(10):   # 90 degrees left
+                wheels[0] -= quarter / 10
+                wheels[1] += quarter / 10
+                pose.update()
+        out = pose.snapshot(array('f', [0.0] * PoseEstimator.FIELDS))
+        self.assertAlmostEqual(out[PoseEstimator.X], 0.0, places=2)
+        self.assertAlmostEqual(out[PoseEstimator.Y], 0.0, places=2)
+        self.assertAlmostEqual(out[PoseEstimator.THETA], 2 * math.pi, places=3)
+        self.assertAlmostEqual(out[PoseEstimator.FORWARD], 400.0, places=2)
+        x, y, heading = pose.get_pose()
+        self.assertAlmostEqual(heading, 360.0, places=1)
+
+    def test_reset_while_running_is_not_torn_by_a_tick(self):
+        """A timer tick that fires in the middle of reset() does not touch the pose."""
+        drivetrain = MagicMock(track_width=15.5)
+        wheels = [0.0, 0.0]
+        drivetrain.get_left_encoder_position.side_effect = lambda: wheels[0]
+        drivetrain.get_right_encoder_position.side_effect = lambda: wheels[1]
+        timer = MagicMock()
+        pose = PoseEstimator(drivetrain, timer=timer)
+        with patch('machine.Timer', create=True):
+            pose.start()
+            irq = timer.init.call_args.kwargs['callback']
+            wheels[:] = [50.0, 50.0]
+            irq(timer)
+            self.assertAlmostEqual(pose.get_pose()[1], 50.0)
+
+            fired = []
+            def left_with_tick():
+                if not fired:
+                    fired.append(1)
+                    irq(timer)  # lands after the state is cleared, before the baselines
+                return wheels[0]
+            wheels[:] = [60.0, 60.0]
+            drivetrain.get_left_encoder_position.side_effect = left_with_tick
+            pose.reset()
+            drivetrain.get_left_encoder_position.side_effect = lambda: wheels[0]
+            self.assertEqual(fired, [1])
+            self.assertTrue(pose.running)
+            self.assertEqual(pose.seq & 1, 0)
+            self.assertEqual(list(pose.snapshot(array('f', [0.0] * PoseEstimator.FIELDS))),
+                             [0.0] * PoseEstimator.FIELDS)
+            wheels[:] = [70.0, 70.0]
+            irq(timer)
+        self.assertAlmostEqual(pose.get_pose()[1], 10.0)
+
+
+class TestRadarFollower(unittest.TestCase):
+    def test_update_searches_then_times_out(self):
+        """Without a target update() spins in place, without sleeping, until max_time."""
+        drivetrain = MagicMock()
+        radar = MagicMock()
+        radar.update.return_value = False
+        radar.closest = -1
+        follower = RadarFollower(drivetrain, radar)
+        clock = [0]
+        with patch.object(time, 'ticks_ms', lambda: clock[0]), \
+                patch.object(time, 'sleep', side_effect=AssertionError("update() slept")):
+            follower.start()
+            for _ in range(10):
+                clock[0] += 50
+                self.assertTrue(follower.update())
+            drivetrain.set_effort.assert_called_with(follower.search_spin, -follower.search_spin)
+            drivetrain.stop.assert_not_called()
+            clock[0] = follower.max_time * 1000 + 1
+            self.assertFalse(follower.update())
+        drivetrain.stop.assert_called_once()
+
+
+class TestObstacleAvoider(unittest.TestCase):
+    def setUp(self):
+        """An avoider with a mocked drivetrain and IMU; each step turns by 4 deg per unit effort."""
+        self.drivetrain = MagicMock()
+        self.drivetrain.track_width = 15.5
+        self.wheel = 0.0  # cm on both encoders
+        self.drivetrain.get_left_encoder_position.side_effect = lambda: self.wheel
+        self.drivetrain.get_right_encoder_position.side_effect = lambda: self.wheel
+        self.efforts = []
+        self.drivetrain.set_effort.side_effect = lambda l, r: self.efforts.append((l, r))
+        self.yaw = 0.0
+        imu = MagicMock()
+        imu.get_yaw.side_effect = lambda: self.yaw
+        self.log = MagicMock()
+        self.radar = MagicMock()
+        self.radar.update.return_value = False
+        self.radar.within.return_value = False
+        self.avoider = ObstacleAvoider(self.drivetrain, self.radar, imu=imu, log=self.log)
+
+    def _turn(self, degrees):
+        self.avoider.start_turn(degrees)
+        self.assertEqual(self.avoider.state, ObstacleAvoider.TURN)
+        steps = 0
+        while not self.avoider.update_turn() and steps < 500:
+            left, right = self.efforts[-1]
+            self.yaw += 4.0 * (right - left) / 2
+            steps += 1
+        return self.avoider._turn_target
+
+    def test_turn_ends_on_imu_yaw_in_the_right_direction(self):
+        """Positive angles turn left, negative right, each ending inside turn_tolerance."""
+        for degrees in (90, -45):
+            self.efforts = []
+            target = self._turn(degrees)
+            self.assertLessEqual(abs(self.yaw - target), self.avoider.turn_tolerance)
+            for left, right in self.efforts:
+                self.assertEqual(right > 0 > left, degrees > 0)
+                self.assertEqual(left > 0 > right, degrees < 0)
+
+    def test_turn_slows_into_the_target(self):
+        """Full turn effort far from the target, the minimum effort close to it."""
+        self._turn(90)
+        speeds = [abs(right) for _, right in self.efforts]
+        self.assertEqual(speeds[0], self.avoider.turn_speed)
+        self.assertEqual(speeds[-1], self.avoider.turn_min_speed)
+        self.assertEqual(speeds, sorted(speeds, reverse=True))
+
+    def test_turn_gives_up_after_timeout(self):
+        """A turn that makes no progress ends after turn_timeout."""
+        clock = [0]
+        with patch.object(time, 'ticks_ms', lambda: clock[0]):
+            self.avoider.start_turn(30)
+            clock[0] = self.avoider.turn_timeout
+            self.assertFalse(self.avoider.update_turn())
+            clock[0] += 1
+            self.assertTrue(self.avoider.update_turn())
+        self.log.assert_called_once_with("Turn timed out")
+
+    def test_update_steps_to_the_goal_without_sleeping(self):
+        """Each update() is one loop; the run ends once the pose reaches target_distance."""
+        with patch.object(time, 'sleep', side_effect=AssertionError("update() slept")):
+            self.avoider.start()
+            steps = 0
+            while self.avoider.update():
+                self.wheel += 10.0 * self.efforts[-1][0]
+                steps += 1
+        self.assertEqual(steps, math.ceil(self.avoider.target_distance / (10.0 * self.avoider.base_speed)))
+        self.assertGreaterEqual(self.avoider.y, self.avoider.target_distance)
+        self.drivetrain.stop.assert_called_once()
+
+    def test_update_ends_on_timeout(self):
+        """A run that makes no progress stops the robot after max_time."""
+        clock = [0]
+        with patch.object(time, 'ticks_ms', lambda: clock[0]):
+            self.avoider.start()
+            self.assertTrue(self.avoider.update())
+            clock[0] = self.avoider.max_time * 1000 + 1
+            self.assertFalse(self.avoider.update())
+        self.drivetrain.stop.assert_called_once()
+        self.log.assert_any_call("Timeout reached. Stopping.")
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -12,10 +12,19 @@ import collections
 import micropython
 import gc
 from neopixel import NeoPixel
-from XRPRadar import XRPRadar
+from XRPRadar import XRPRadar, corridor_zone
 from machine import Pin, time_pulse_us
 from RadarFollower import RadarFollower
 from ObstacleAvoider import ObstacleAvoider
+from RadarGroup import RadarGroup
+from RadarTracker import RadarTracker
+from RadarService import RadarService
+from CollisionGuard import CollisionGuard
+from TaskRuntime import TaskRuntime
+from ControlTick import ControlTick
+from TrackedDrive import TrackedDrive
+from MotionProfile import TrapezoidProfile
+from PoseEstimator import PoseEstimator
 
 VERSION = "1.3.1"
 
@@ -29,14 +38,43 @@ led = NeoPixel(Pin(37), 1)  # WS2812 RGB LED
 
 current_threshold = 20
 last_button_state = False
+CORRIDOR_WIDTH = 30       # cm - robot width plus margin, for the radar safety zone
+SHIELD_FLOOR = 10.0       # cm - radar 'noise' ghosts live below this
+# Motion profile for safety_drive (wheel revolutions, like motor.get_position)
+FULL_SPEED_RPS = 2.0      # wheel rev/s at effort 1.0 - calibrate per robot
+PROFILE_ACCEL = 6.0       # rev/s^2 ramp-up
+PROFILE_DECEL = 4.0       # rev/s^2 ramp-down into the target
+PROFILE_CREEP = 0.25      # fraction of the cruise speed to start/finish at (motor deadband)
+ZONE_EFFORT = 0.7         # fastest effort driven with the safety zone on (TEST, PLAYBACK)
+safety_zone_active = False
 
-#radar = XRPRadar(uart_id=0, tx_pin=machine.Pin(12), rx_pin=machine.Pin(13))
-hlk_radar = XRPRadar(uart_id=0, tx_pin=18, rx_pin=19, baudrate=256000)
-follower = RadarFollower(drivetrain, hlk_radar, imu=imu)  # optional imu
-avoider = ObstacleAvoider(drivetrain, hlk_radar)
 log_messages = collections.deque((),50)
 log_scroll_index = 0
 
+def add_log(msg):
+    width = 15
+    for i in range(0, len(msg), width):
+        log_messages.append(msg[i:i+width])
+
+#radar = XRPRadar(uart_id=0, tx_pin=machine.Pin(12), rx_pin=machine.Pin(13))
+hlk_radar = XRPRadar(uart_id=0, tx_pin=18, rx_pin=19, baudrate=256000)
+hlk_radar.set_work_budget(max_bytes=256, max_us=1500)  # keep radar reads short inside control loops
+# All radars in one robot-frame target set (x right, y forward). The origin
+# is the front radar, so distances still mean distance from the front.
+radar_group = RadarGroup()
+radar_group.add(hlk_radar, x_cm=0, y_cm=0, yaw_deg=0)          # front
+#rear_radar = XRPRadar(uart_id=1, tx_pin=12, rx_pin=13, baudrate=256000)
+#radar_group.add(rear_radar, x_cm=0, y_cm=-16, yaw_deg=180)    # rear
+# One reader for the group: every consumer below shares its fused frame
+radar_service = RadarService(radar_group)
+tracker = RadarTracker(radar_service, min_range=SHIELD_FLOOR)  # tracks ignore sub-floor ghosts
+follower = RadarFollower(drivetrain, radar_service, imu=imu, log=add_log)  # optional imu
+pose = PoseEstimator(drivetrain, imu)  # x, y, heading from encoders + IMU at 100 Hz
+avoider = ObstacleAvoider(drivetrain, radar_service, imu=imu, pose=pose, log=add_log)
+guard = CollisionGuard(drivetrain, tracker)  # time-to-collision braking for safety_drive
+control_tick = ControlTick(rate_hz=100)  # fixed-rate control loop for safety_drive
+tracked = TrackedDrive(drivetrain, imu)  # holds the commanded line/arc on both encoders + IMU yaw
+
 # Recording system
 recording = []
 
@@ -50,11 +88,6 @@ def get_real_volts():
     battery_v = measured_v * 4.0303
     return battery_v
 
-def add_log(msg):
-    width = 15
-    for i in range(0, len(msg), width):
-        log_messages.append(msg[i:i+width])
-
 def set_led_green():
     led[0] = (0, 64, 0)
     led.write()
@@ -171,18 +204,7 @@ def error_routine(error_msg, e=None):
     raise SystemExit(f"Exiting: {error_msg}")
 
 def get_radar_distance():
-    report = hlk_radar.parse_radar_report()
-    if report:
-        min_dist = float('inf')
-        for i in range(0, len(report), 4):
-            x, y, speed, res = report[i:i+4]
-            if res > 0 and (x != 0 or y != 0):  # valid target
-                dist = math.sqrt(x**2 + y**2)   # Euclidean distance in cm
-                if dist < min_dist:
-                    min_dist = dist
-        if min_dist != float('inf'):
-            return min_dist
-    return 65535  # no targets (match ultrasonic timeout)
+    return radar_service.get_distance()  # 65535 if no targets (match ultrasonic timeout)
 
 def draw_distance_bar(dist, bar_y=75):
     display.rect(14, bar_y, 102, 10, 1)
@@ -199,64 +221,112 @@ def draw_distance_bar(dist, bar_y=75):
     thresh_px = 100 - int(max(0, min(100, current_threshold)))
     display.vline(15 + thresh_px, bar_y - 2, 14, 1)
 
-def safety_drive(left_eff, right_eff, target_distance):
+def set_safety_zone(enable):
+    """
+    Limits radar reports to the driving corridor so ghosts and off-path
+    targets never reach the parser. The corridor runs from SHIELD_FLOOR out
+    to where the collision guard starts braking at ZONE_EFFORT, so its
+    slowdown band sees targets before the hard floor does.
+    """
+    global safety_zone_active
+    if enable:
+        cruise = FULL_SPEED_RPS * ZONE_EFFORT * math.pi * getattr(drivetrain, 'wheel_diam', 6.0)  # cm/s
+        zone = corridor_zone(guard.reach_cm(cruise, current_threshold), CORRIDOR_WIDTH, SHIELD_FLOOR)
+        seq = hlk_radar.set_zone_filter(XRPRadar.ZONE_DETECT, [zone])
+    else:
+        seq = hlk_radar.clear_zone_filter()
+    ok = seq.wait()
+    safety_zone_active = enable and ok
+    if not ok:
+        add_log("Radar zone cmd failed")
+
+def safety_drive(left_eff, right_eff, target_distance, profiled=True):
+    """
+    Drives at the ratio of left_eff/right_eff until target_distance wheel
+    revolutions are done. With profiled=True the efforts ramp up and down
+    along a trapezoidal profile instead of stepping on and off.
+    """
     add_log("Drive command received...")
 
-    # 1. Reset the position for the EncodedMotor objects
-    # In this library version, the method is reset_relative_position
-    try:
-        drivetrain.left_motor.reset_relative_position()
-        drivetrain.right_motor.reset_relative_position()
-    except AttributeError:
-        # Fallback for some specific XRP versions
-        try:
-            drivetrain.left_motor.reset_encoder_position()
-            drivetrain.right_motor.reset_encoder_position()
-        except Exception as e:
-            error_routine("Motor encoder reset failed", f"Exception: {e}")
-    except Exception as e:
-        error_routine("Motor encoder reset failed", f"Exception: {e}")
+    # 1. Encoders are not reset: the drive measures from its own baselines
+    # and the pose estimator keeps integrating across drives
 
     start_ms = time.ticks_ms()
+    tracker.reset()
+    guard.reset()
+    scale = 1.0
+    stop_msg = None
+    dt = 1 / control_tick.rate_hz
+    # Cruise is the commanded effort; the profile hands out a fraction of it
+    cruise = FULL_SPEED_RPS * max(abs(left_eff), abs(right_eff))
+    creep = PROFILE_CREEP * cruise
+    profile = TrapezoidProfile(target_distance, cruise, PROFILE_ACCEL, PROFILE_DECEL,
+                               v_start=creep, v_end=creep) if profiled and cruise else None
+    first = profile.v_start / cruise if profile else 1.0
+    timeout_ms = max(5000, int(profile.duration * 1500)) if profile else 5000
 
     # 2. Start moving
     try:
-        drivetrain.set_effort(left_eff, right_eff)
+        tracked.start(left_eff, right_eff, target_distance)
+        drivetrain.set_effort(left_eff * first, right_eff * first)
     except Exception as e:
         error_routine("Failed to set motor effort", f"Exception: {e}")
 
-    while True:
-        try:
-            dist_moved = abs(drivetrain.left_motor.get_position())
-        except Exception as e:
-            error_routine("Failed to get motor position", f"Exception: {e}")
+    def step():
+        """One control tick: encoders + IMU + cached radar state in, motor command out."""
+        nonlocal scale, stop_msg
 
-        # 1. Target Reach Check
-        if dist_moved >= abs(target_distance):
-            add_log(f"Target reached: {dist_moved:.1f}")
-            break
-
-        # 2. Get distance
-        d = get_radar_distance()
+        # 1. Feed the newest radar frame to the tracker
+        tracker.update()
 
-        # 3. THE SOFTWARE SHIELD:
+        # 2. THE SOFTWARE SHIELD:
         # We know your 'noise' is around 5cm.
-        # By setting the floor to 10cm, we ignore all electrical ghosts.
-        if 10.0 < d < current_threshold:
-            utime.sleep_ms(10)
-            # Current distance readout
-            d_check = get_radar_distance()
+        # The tracker drops everything under the 10cm floor, and a track has
+        # to persist over several frames before it counts as a real wall
+        # (a single hit is enough once the sensor-side zone filters ghosts).
+        # Braking is by time-to-collision: the faster we close in, the
+        # earlier we slow down; current_threshold is the hard floor.
+        new_scale = guard.update(current_threshold, confirmed=not safety_zone_active)
+        if new_scale == 0:
+            drivetrain.stop()
+            d = math.sqrt(tracker.nearest_any_sq if safety_zone_active else tracker.nearest_sq) / 10  # mm -> cm, for the log only
+            stop_msg = f"REAL Obstacle at {d:.1f}cm. Stopping."
+            return False
+        if abs(new_scale - scale) > 0.05:
+            scale = new_scale
+
+        # 3. Profile setpoint: ramp up on the clock, cruise and ramp down on
+        # the measured progress so a lagging robot still lands on the target
+        shape = 1.0
+        if profile:
+            t = time.ticks_diff(time.ticks_ms(), start_ms) / 1000
+            shape = profile.command(t, tracked.progress) / cruise
+
+        # 4. Hold the line/arc and check the target on both wheels
+        if not tracked.update(scale * shape, dt):
+            drivetrain.stop()
+            stop_msg = f"Target reached: {tracked.progress:.1f} hdg{tracked.heading_error:+.1f}"
+            return False
 
-            # If it's still between 10 and threshold, it's a real wall.
-            if 10.0 < d_check < current_threshold:
-                add_log(f"REAL Obstacle at {d_check:.1f}cm. Stopping.")
-                break
+        # 5. Safety Timeout
+        return time.ticks_diff(time.ticks_ms(), start_ms) <= timeout_ms
 
-        # 4. Safety Timeout
-        if time.ticks_diff(time.ticks_ms(), start_ms) > 5000:
-            break
-
-        time.sleep(0.01)
+    # Steps run at a fixed rate off the timer, not after a sleep, so the
+    # reaction time does not depend on how long the rest of the loop took
+    control_tick.start(step)
+    try:
+        control_tick.wait()
+    except Exception as e:
+        drivetrain.stop()
+        error_routine("Drive control step failed", f"Exception: {e}")
+    finally:
+        control_tick.stop()  # Ctrl-C/SystemExit too: no step() may run after this
+    if stop_msg:
+        add_log(stop_msg)
+    stats = control_tick.get_stats()
+    add_log(f"Tick {stats['period_min_us']}/{stats['period_mean_us']}/{stats['period_max_us']}us ov{stats['overruns']}")
+    x, y, heading = pose.get_pose()
+    add_log(f"Pose X{x:.0f} Y{y:.0f} H{heading:.0f}")
 
     # Stop all motors
     try:
@@ -278,25 +348,6 @@ def get_radar_report():
         return True
     return False
 
-def set_multi_target(self, enable=True):
-    """
-    Toggles between multi-target and single-target tracking.
-    """
-    # 1. Enter Configuration Mode
-    self.ser.write(b'\xFD\xFC\xFB\xFA\x04\x00\xFF\x00\x01\x00')
-    time.sleep(0.1)
-    
-    # 2. Set Tracking Mode (0x00 for Single, 0x01 for Multi)
-    mode = b'\x01' if enable else b'\x00'
-    # Command: Header + Length + Command(0x0080) + Mode + Tail
-    cmd = b'\xFD\xFC\xFB\xFA\x02\x00\x80\x00' + mode + b'\x04\x03\x02\x01'
-    self.ser.write(cmd)
-    time.sleep(0.1)
-    
-    # 3. Exit Configuration Mode
-    self.ser.write(b'\xFD\xFC\xFB\xFA\x02\x00\xFE\x00\x04\x03\x02\x01')
-    add_log(f"Radar: {'Multi' if enable else 'Single'}")
-
 def run_joystick_control():
     """Directly control the XRP drivetrain using the Qwiic Joystick."""
     if not qwiic_i2c.is_device_connected(0x20):
@@ -403,25 +454,23 @@ def run_program(index):
 
         # Program Menu Logic
         if index == 0: # TEST - out and back
-            safety_drive(0.7, 0.7, 8.0)
-            time.sleep(0.5)
-            safety_drive(-0.7, -0.7, -8.0)
-        elif index == 3:  # FOLLOW
-            try:
-                follower.run()
-            except Exception as e:
-                error_routine("Follower run failed", f"Exception: {e}")
-        elif index == 4:  # AVOID
+            set_safety_zone(True)
             try:
-                avoider.run()
-            except Exception as e:
-                error_routine("Avoider run failed", f"Exception: {e}")
+                safety_drive(0.7, 0.7, 8.0)
+                time.sleep(0.5)
+                safety_drive(-0.7, -0.7, -8.0)
+            finally:
+                set_safety_zone(False)  # the sensor keeps its filter across resets
         elif index == 5:  # JOYSTICK
             run_joystick_control()
         elif index == 8:  # RECORD
             record_movement()
         elif index == 9:  # PLAYBACK
-            playback_movement()
+            set_safety_zone(True)
+            try:
+                playback_movement()
+            finally:
+                set_safety_zone(False)
         
         try: seesaw_device.set_led(0, 64, 0) # Green for Idle
         except Exception as e:
@@ -458,19 +507,203 @@ def set_distance_mode():
     try: seesaw_device.set_led(0, 64, 0)
     except: pass
 
-def main():
-    global last_button_state, log_scroll_index
+MENUS = ["TEST", "SET LIMIT", "HLK-LD2450", "FOLLOW", "AVOID", "JOYSTICK", "IMU", "LOG", "RECORD", "PLAYBACK"]
+
+# Runtime task periods (ms). Each task runs on its own schedule, so a slow
+# display push only delays the others by one run.
+TASK_PERIODS = {
+    "radar": 20,      # pull the newest radar frame into radar_service
+    "input": 20,      # encoder + button
+    "display": 100,   # dashboard render
+    "battery": 1000,  # ADC sample
+    "program": 20,    # start the selected program / step FOLLOW and AVOID
+    "gc": 500,        # gc.collect()
+}
+
+class UiState:
+    """Latest values shared between the runtime tasks."""
     imu_mode = False
     radar_mode = False
     radar_multi = True
-    log_mode = False  # new log display toggle
-    log_messages = []
-#    last_mem_check = time.ticks_ms()
-    last_slow_update = 0
+    log_mode = False
+    pos = 0
+    count = 0
+    current_dist = 65535
     batt_str = "0.00V"
     radar_str = "Multi"
+    radar_cmd = None      # pending HLK-LD2450 mode switch
+    program = None        # menu index waiting for the program task
+    stepping = None       # follower/avoider being stepped by the program task
+    last_press_ms = 0
+
+ui = UiState()
+runtime = TaskRuntime()
+
+def radar_task():
+    ui.current_dist = get_radar_distance()
+    # Finish a radar mode switch once its ACKs are in
+    if ui.radar_cmd is not None and ui.radar_cmd.poll():
+        if ui.radar_cmd.success:
+            add_log(f"Mode -> {'Multi' if ui.radar_multi else 'Single'}")
+        else:
+            ui.radar_multi = not ui.radar_multi  # sensor kept the old mode
+            add_log("Radar: mode switch failed")
+        ui.radar_cmd = None
 
-    
+def input_task():
+    global last_button_state
+    try:
+        ui.pos = seesaw_device.get_position()
+        ui.count = ui.pos % len(MENUS)
+        btn = seesaw_device.get_button()
+    except Exception as e:
+        error_routine("Failed to read encoder/button", f"Exception: {e}")
+
+    now = time.ticks_ms()
+    if btn and not last_button_state and time.ticks_diff(now, ui.last_press_ms) > 100:  # debounce
+        ui.last_press_ms = now
+        count = ui.count
+        if count == 6:   # IMU - toggle display modes
+            if not ui.imu_mode and not ui.radar_mode:
+                ui.imu_mode = True
+            elif ui.imu_mode:
+                ui.imu_mode = False
+                ui.radar_mode = True
+            elif ui.radar_mode:
+                ui.radar_mode = False
+        elif count == 2:   # HLK-LD2450
+            if ui.radar_cmd is None:
+                ui.radar_multi = not ui.radar_multi
+                ui.radar_cmd = hlk_radar.set_multi_target(ui.radar_multi)
+            ui.radar_mode = True
+            ui.imu_mode = False
+        elif count == 7:  # LOG - toggle log display mode
+            ui.log_mode = not ui.log_mode
+            if ui.log_mode:
+                ui.imu_mode = False  # turn off other modes when viewing log
+                ui.radar_mode = False
+                runtime.log_stats(add_log)  # task jitter since the last look
+                runtime.reset_stats()
+        elif ui.program is None:
+            ui.imu_mode = False
+            ui.radar_mode = False
+            ui.program = count
+    last_button_state = btn
+
+def battery_task():
+    ui.batt_str = f"{get_real_volts():.2f}V"
+    ui.radar_str = "Multi" if ui.radar_multi else "Single"
+
+def program_task():
+    if ui.stepping is not None:
+        # FOLLOW/AVOID: one loop per period, so input, display and battery
+        # keep their schedule while the robot drives
+        try:
+            if ui.stepping.update():
+                return
+            try: seesaw_device.set_led(0, 64, 0) # Green for Idle
+            except Exception as e:
+                add_log(f"LED error: {e}")
+        except Exception as e:
+            error_routine(f"Prog {ui.program} Fail", f"Exception: {e}")
+        ui.stepping = None
+        ui.program = None
+        return
+    if ui.program is None:
+        return
+    if ui.program in (3, 4):  # FOLLOW, AVOID
+        try: seesaw_device.set_led(64, 0, 0) # Red for Driving
+        except Exception as e:
+            add_log(f"LED error: {e}")
+        try:
+            ui.stepping = follower if ui.program == 3 else avoider
+            ui.stepping.start()
+        except Exception as e:
+            error_routine(f"Prog {ui.program} Fail", f"Exception: {e}")
+            ui.stepping = None
+            ui.program = None
+        return
+    # The other programs still drive the robot in their own blocking loops;
+    # radar ingest carries on in the UART IRQ while they run.
+    if ui.program == 1:  # SET LIMIT
+        set_distance_mode()
+    else:
+        run_program(ui.program)
+    ui.program = None
+    runtime.reset_stats()  # the blocked period is not scheduling jitter
+
+def gc_task():
+    gc.collect()
+
+def display_task():
+    try:
+        lines = list(log_messages)
+        if ui.log_mode:
+            # Use encoder to scroll through log_messages
+            max_scroll = max(0, len(lines) - 14)
+            scroll_offset = max(0, min(max_scroll, ui.pos))
+            display.fill(0)
+            # Show 14 lines starting from the scroll index
+            for i in range(14):
+                idx = scroll_offset + i
+                if idx < len(lines):
+                    display.text(lines[idx], 0, i * 9, 1)
+        else:
+            # Normal dashboard display
+            current_dist = ui.current_dist
+            display.fill(0)
+            display.text("XRP DASHBOARD", 15, 4, 1)
+            display.hline(0, 14, 128, 1)
+            display.text(f"MODE: {MENUS[ui.count]}", 5, 24, 1)
+            display.text(f"BATT: {ui.batt_str}", 5, 44, 1)
+            display.text(f"RADAR: {ui.radar_str}", 5, 54, 1)
+
+            # Current distance readout
+            if current_dist >= 65500:
+                display.text("DIST: NO SENSOR", 5, 64, 1)
+            else:
+                display.text(f"DIST: {int(current_dist)}cm", 5, 64, 1)
+
+            # === Distance bar + IMU / Radar + LOG ===
+            if ui.imu_mode or ui.radar_mode:
+                bar_y = 75          # higher when active
+                data_y = 85         # data start
+                log_y = 115         # log below data (room for 2 lines)
+            else:
+                bar_y = 90          # normal
+                data_y = 0          # no data
+                log_y = 105         # log right below bar
+
+            draw_distance_bar(current_dist, bar_y)
+
+            if ui.imu_mode:
+                accel = [x / 1000.0 for x in imu.get_acc_rates()]
+                gyro  = [x / 1000.0 for x in imu.get_gyro_rates()]
+                heading = imu.get_heading()
+                display.text(f"A: {accel[0]:.1f} {accel[1]:.1f} {accel[2]:.1f} g", 5, data_y, 1)
+                display.text(f"G: {gyro[0]:.1f} {gyro[1]:.1f} {gyro[2]:.1f} d/s", 5, data_y + 9, 1)
+                x, y, _ = pose.get_pose()
+                display.text(f"H{heading:.0f} X{x:.0f} Y{y:.0f}", 5, data_y + 18, 1)
+
+            if ui.radar_mode:
+                report = radar_service.get_report()  # same frame the distance came from
+                if report:
+                    num_targets = 3 if ui.radar_multi else 1
+                    for i in range(0, num_targets * 4, 4):
+                        x, y, speed, res = report[i:i+4]
+                        display.text(f"T{(i//4)+1}: X{x:3.0f} Y{y:3.0f} S{speed:2.0f} R{res:2.0f}", 5, data_y + (i//4)*9, 1)
+                else:
+                    display.text("NO TARGETS", 5, data_y, 1)
+
+            # === Rolling Log (always shown, below everything) ===
+            for idx, msg in enumerate(lines[-2:]):
+                display.text(msg[:14], 5, log_y + idx * 9, 1)  # truncate to 14 characters to fit screen
+
+        display.show()
+    except Exception as e:
+        error_routine("Display update failed", f"Exception: {e}")
+
+def main():
     add_log(f"XRP System v{VERSION} starting")
     try:
         imu.calibrate()
@@ -478,12 +711,21 @@ def main():
     except Exception as e:
         error_routine("IMU calibration failed", f"Exception: {e}")
     try:
-        hlk_radar.multi_target_tracking()
-        time.sleep(0.1)
-        hlk_radar.poll_for_response() # This consumes and "discards" the OK
-        add_log("Radar initialized to multi-target")
+        baud = hlk_radar.negotiate_baud()
+        if baud is None:
+            add_log("Radar: no data at any baud")
+        else:
+            add_log(f"Radar link: {baud} baud")
+        if hlk_radar.set_multi_target(True).wait():
+            add_log("Radar initialized to multi-target")
+        else:
+            add_log("Radar: no ACK for multi-target")
+        # A safety zone left behind by an aborted drive survives in the sensor
+        if not hlk_radar.clear_zone_filter().wait():
+            add_log("Radar: zone clear failed")
+        radar_group.start_background()  # UART IRQs keep every radar drained from here on
     except Exception as e:
-        error_routine("Radar initialization failed", f"Exception: {e}, radar_multi={radar_multi}")
+        error_routine("Radar initialization failed", f"Exception: {e}, radar_multi={ui.radar_multi}")
     try:
         if qwiic_i2c.is_device_connected(0x20):
             add_log("Joystick: Connected")
@@ -495,146 +737,16 @@ def main():
     try: seesaw_device.set_led(0, 64, 0)
     except: pass
     set_led_green()  # System running indicator
-
-    menus = ["TEST", "SET LIMIT", "HLK-LD2450", "FOLLOW", "AVOID", "JOYSTICK", "IMU", "LOG", "RECORD", "PLAYBACK"]
-
-    while True:
-        gc.collect()
-        
-#        current_time = time.ticks_ms()
-#        if time.ticks_diff(current_time, last_mem_check) > 10000: # 10 seconds
-#            allocated = gc.mem_alloc()
-#            free = gc.mem_free()
-#            total = allocated + free
-#            # Safely output the f-string to the console
-#            print(f"--- MEMORY CHECK ---")
-#            print(f"Allocated: {allocated} bytes")
-#            print(f"Free:      {free} bytes")
-#            print(f"Usage:     {(allocated/total)*100:.1f}%")
-#            add_log(f"Mem: {allocated//1024}K")
-#            last_mem_check = current_time
-        
-        try:
-            current_dist = get_radar_distance()
-            pos = seesaw_device.get_position()
-            count = (pos) % len(menus)
-        except Exception as e:
-            error_routine("Failed to read encoder position", f"Exception: {e}")
-
-        try:
-            if log_mode:
-                # Use encoder to scroll through log_messages
-                # Reverse direction usually feels more natural for scrolling
-                max_scroll = max(0, len(log_messages) - 14)
-                scroll_offset = max(0, min(max_scroll, pos))
-#                log_scroll_index = pos % max(1, len(log_messages))
-                display.fill(0)
-                # Show 14 lines starting from the scroll index
-#                start = log_scroll_index
-                for i in range(14):
-#                    if (start + i) < len(log_messages):
-#                        display.text(log_messages[start + i], 0, i * 9, 1)
-                    idx = scroll_offset + i
-                    if idx < len(log_messages):
-                        display.text(log_messages[idx], 0, i * 9, 1)
-            else:
-                # Normal dashboard display
-                display.fill(0)
-                display.text("XRP DASHBOARD", 15, 4, 1)
-                display.hline(0, 14, 128, 1)
-                display.text(f"MODE: {menus[count]}", 5, 24, 1)
-                display.text(f"RADAR: {'Multi' if radar_multi else 'Single'}", 5, 54, 1)
-                now = time.ticks_ms()
-                if time.ticks_diff(now, last_slow_update) > 1000:
-                    batt_str = f"{get_real_volts():.2f}V"
-                    radar_str = "Multi" if radar_multi else "Single"
-                    last_slow_update = now
-                if not log_mode:
-                    display.text(f"BATT: {batt_str}", 5, 44, 1)
-                    display.text(f"RADAR: {radar_str}", 5, 54, 1)
-
-                # Current distance readout
-                if current_dist >= 65500:
-                    display.text("DIST: NO SENSOR", 5, 64, 1)
-                else:
-                    display.text(f"DIST: {int(current_dist)}cm", 5, 64, 1)
-
-                # === Distance bar + IMU / Radar + LOG ===
-                if imu_mode or radar_mode:
-                    bar_y = 75          # higher when active
-                    data_y = 85         # data start
-                    log_y = 115         # log below data (room for 2 lines)
-                else:
-                    bar_y = 90          # normal
-                    data_y = 0          # no data
-                    log_y = 105         # log right below bar
-
-                draw_distance_bar(current_dist, bar_y)
-
-                if imu_mode:
-                    accel = [x / 1000.0 for x in imu.get_acc_rates()]
-                    gyro  = [x / 1000.0 for x in imu.get_gyro_rates()]
-                    heading = imu.get_heading()
-                    display.text(f"A: {accel[0]:.1f} {accel[1]:.1f} {accel[2]:.1f} g", 5, data_y, 1)
-                    display.text(f"G: {gyro[0]:.1f} {gyro[1]:.1f} {gyro[2]:.1f} d/s", 5, data_y + 9, 1)
-                    display.text(f"H: {heading:.1f} deg", 5, data_y + 18, 1)
-
-                if radar_mode:
-                    report = hlk_radar.parse_radar_report()
-                    if report:
-                        num_targets = 3 if radar_multi else 1
-                        for i in range(0, num_targets * 4, 4):
-                            x, y, speed, res = report[i:i+4]
-                            display.text(f"T{(i//4)+1}: X{x:3.0f} Y{y:3.0f} S{speed:2.0f} R{res:2.0f}", 5, data_y + (i//4)*9, 1)
-                    else:
-                        display.text("NO TARGETS", 5, data_y, 1)
-
-                # === Rolling Log (always shown, below everything) ===
-                for idx, msg in enumerate(log_messages):
-                    display.text(msg[:14], 5, log_y + idx * 9, 1)  # truncate to 14 characters to fit screen
-
-            display.show()
-        except Exception as e:
-            error_routine("Display update failed", f"Exception: {e}")
-
-        try:
-            btn = seesaw_device.get_button()
-        except Exception as e:
-            error_routine("Failed to read button", f"Exception: {e}")
-
-        if btn and not last_button_state:
-            time.sleep(0.1) # Debounce
-            if count == 6:   # IMU - toggle display modes
-                if not imu_mode and not radar_mode:
-                    imu_mode = True
-                elif imu_mode:
-                    imu_mode = False
-                    radar_mode = True
-                elif radar_mode:
-                    radar_mode = False
-            elif count == 2:   # HLK-LD2450
-                radar_multi = not radar_multi
-                hlk_radar.set_multi_target(radar_multi)
-                radar_mode = True
-                imu_mode = False
-                add_log(f"Mode -> {'Multi' if radar_multi else 'Single'}")
-            elif count == 7:  # LOG - toggle log display mode
-                log_mode = not log_mode
-                if log_mode:
-                    imu_mode = False  # turn off other modes when viewing log
-                    radar_mode = False
-            else:
-                imu_mode = False
-                radar_mode = False
-                if count == 1:  # SET LIMIT
-                    set_distance_mode()
-                else:
-                    run_program(count)
-
-        last_button_state = btn
-        time.sleep(0.02)
-
-        hlk_radar.poll_for_response()
+    pose.reset()  # baselines after imu.calibrate(), not from import time
+    pose.start()  # odometry runs off its own timer from here on
+
+    runtime.add("radar", radar_task, TASK_PERIODS["radar"])
+    runtime.add("input", input_task, TASK_PERIODS["input"])
+    runtime.add("display", display_task, TASK_PERIODS["display"])
+    runtime.add("battery", battery_task, TASK_PERIODS["battery"])
+    runtime.add("program", program_task, TASK_PERIODS["program"])
+    runtime.add("gc", gc_task, TASK_PERIODS["gc"])
+    runtime.run()
 
 # Entry point
 if __name__ == "__main__":
@@ -15,6 +15,7 @@ from XRPRadar import XRPRadar
 from machine import Pin, time_pulse_us
 from RadarFollower import RadarFollower
 from ObstacleAvoider import ObstacleAvoider
+from RadarService import RadarService
 
 VERSION = "1.3.0"
 
@@ -29,13 +30,25 @@ led = NeoPixel(Pin(37), 1)  # WS2812 RGB LED
 current_threshold = 20
 last_button_state = False
 
+log_messages = collections.deque((),50)
+log_scroll_index = 0
+
+def add_log(msg):
+    # 1. Simple duplicate filter to prevent spamming memory
+    if len(log_messages) > 0 and log_messages[-1] == msg[:15]:
+        return
+
+    width = 15
+    for i in range(0, len(msg), width):
+        # deque automatically discards the oldest item when it hits 50
+        log_messages.append(msg[i:i+width])
+
 #radar = XRPRadar(uart_id=0, tx_pin=machine.Pin(12), rx_pin=machine.Pin(13))
 hlk_radar = XRPRadar(uart_id=0, tx_pin=18, rx_pin=19, baudrate=256000)
-follower = RadarFollower(drivetrain, hlk_radar, imu=imu)  # optional imu
-avoider = ObstacleAvoider(drivetrain, hlk_radar)
+radar_service = RadarService(hlk_radar)  # follower/avoider read the radar through this
+follower = RadarFollower(drivetrain, radar_service, imu=imu, log=add_log)  # optional imu
+avoider = ObstacleAvoider(drivetrain, radar_service, imu=imu, log=add_log)
 radar_buffer = ""
-log_messages = collections.deque((),50)
-log_scroll_index = 0
 
 def get_real_volts():
     total = 0
@@ -47,16 +60,6 @@ def get_real_volts():
     battery_v = measured_v * 4.0303
     return battery_v
 
-def add_log(msg):
-    # 1. Simple duplicate filter to prevent spamming memory
-    if len(log_messages) > 0 and log_messages[-1] == msg[:15]:
-        return
-
-    width = 15
-    for i in range(0, len(msg), width):
-        # deque automatically discards the oldest item when it hits 50
-        log_messages.append(msg[i:i+width])
-
 def set_led_green():
     led[0] = (0, 64, 0)
     led.write()